@@ -0,0 +1,184 @@
+"""
+Rolling min/avg/max/p95 of node stats over fixed time windows
+Updated in O(1) per sample, so reporting them never rescans history
+"""
+
+import math
+from array import array
+from collections import deque
+
+# Windows and stats used when config.ini has no [aggregates] section
+DEFAULT_WINDOWS = '1m, 5m, 15m'
+DEFAULT_METRICS = 'temp, cpu_percent, ram_percent'
+DURATION_UNITS = {'s': 1, 'm': 60, 'h': 3600}
+
+QUANTILE = 0.95
+# Quantile bins are logarithmic: any value in a bin is within BIN_ACCURACY
+# (relative) of the bin's midpoint. Values below BIN_FLOOR share bin 0,
+# values above BIN_CEILING the last bin.
+BIN_ACCURACY = 0.01
+BIN_FLOOR = 0.01
+BIN_CEILING = 1e7
+BIN_GAMMA = (1 + BIN_ACCURACY) / (1 - BIN_ACCURACY)
+BIN_LOG_GAMMA = math.log(BIN_GAMMA)
+BIN_OFFSET = math.floor(math.log(BIN_FLOOR) / BIN_LOG_GAMMA) - 1
+BINS = math.ceil(math.log(BIN_CEILING) / BIN_LOG_GAMMA) - BIN_OFFSET + 1
+
+def parse_duration(text):
+    """Seconds in '90', '90s', '5m' or '1h'; raises ValueError"""
+    text = text.strip().lower()
+    unit = DURATION_UNITS.get(text[-1:], None)
+    seconds = float(text[:-1] if unit else text) * (unit or 1)
+    if seconds <= 0:
+        raise ValueError(f"Window must be positive: {text!r}")
+    return int(seconds) if seconds == int(seconds) else seconds
+
+def window_label(seconds):
+    """Shortest label for a window: 60 -> '1m', 90 -> '90s', 3600 -> '1h'"""
+    for unit, size in sorted(DURATION_UNITS.items(), key=lambda item: -item[1]):
+        if seconds % size == 0:
+            return f"{int(seconds // size)}{unit}"
+    return f"{seconds}s"
+
+def parse_aggregates(config):
+    """Read (window seconds, metrics) from [aggregates] in config.ini
+
+    windows is a comma-separated list of durations; an empty metrics
+    value turns the aggregates off.
+    """
+    windows = config.get('aggregates', 'windows', fallback=DEFAULT_WINDOWS)
+    metrics = config.get('aggregates', 'metrics', fallback=DEFAULT_METRICS)
+    windows = sorted({parse_duration(window) for window in windows.split(',') if window.strip()})
+    metrics = tuple(metric.strip() for metric in metrics.split(',') if metric.strip())
+    if not metrics:
+        return [], ()
+    return windows, metrics
+
+def bin_index(value):
+    """Quantile bin of a value"""
+    if value < BIN_FLOOR:
+        return 0
+    return min(BINS - 1, math.ceil(math.log(value) / BIN_LOG_GAMMA) - BIN_OFFSET)
+
+def bin_value(index):
+    """Midpoint of a quantile bin, the value reported for anything in it"""
+    if index == 0:
+        return 0.0
+    return 2 * BIN_GAMMA ** (index + BIN_OFFSET) / (BIN_GAMMA + 1)
+
+class RollingWindow:
+    """min/avg/max/p95 of one metric over the last `seconds` seconds
+
+    Samples are queued in arrival order and dropped once they fall out of
+    the window. min and max are the heads of two monotonic deques (every
+    sample enters and leaves each at most once), the average is a running
+    sum and p95 comes from a histogram of logarithmic bins whose counts
+    go down as samples expire. Each add() is amortized O(1); result()
+    walks bins down from the maximum's, usually only a few.
+    """
+
+    __slots__ = ('seconds', 'samples', 'lows', 'highs', 'total', 'expired', 'counts')
+
+    def __init__(self, seconds):
+        self.seconds = seconds
+        self.samples = deque()  # (time, value, bin)
+        self.lows = deque()  # (time, value), values increasing
+        self.highs = deque()  # (time, value), values decreasing
+        self.total = 0.0
+        self.expired = 0
+        self.counts = array('I', bytes(4 * BINS))
+
+    def expire(self, now):
+        """Drop samples taken `seconds` or more before now"""
+        cutoff = now - self.seconds
+        samples = self.samples
+        while samples and samples[0][0] <= cutoff:
+            _, value, index = samples.popleft()
+            self.total -= value
+            self.counts[index] -= 1
+            self.expired += 1
+        while self.lows and self.lows[0][0] <= cutoff:
+            self.lows.popleft()
+        while self.highs and self.highs[0][0] <= cutoff:
+            self.highs.popleft()
+        if self.expired >= len(samples):
+            # Re-add from scratch now and then so subtraction error can't build up
+            self.total = math.fsum(sample[1] for sample in samples)
+            self.expired = 0
+
+    def add(self, now, value, index):
+        """Add a sample taken at monotonic time now, in quantile bin index"""
+        self.expire(now)
+        self.samples.append((now, value, index))
+        self.total += value
+        self.counts[index] += 1
+        while self.lows and self.lows[-1][1] >= value:
+            self.lows.pop()
+        self.lows.append((now, value))
+        while self.highs and self.highs[-1][1] <= value:
+            self.highs.pop()
+        self.highs.append((now, value))
+
+    def quantile(self, q):
+        """Approximate q-quantile of the samples in the window, within [min, max]"""
+        low, high = self.lows[0][1], self.highs[0][1]
+        # Nearest rank: the smallest sample with at least q of them at or below it
+        rank = math.ceil(q * len(self.samples)) - 1
+        remaining = len(self.samples)
+        index = bin_index(high)
+        while index > 0:
+            remaining -= self.counts[index]
+            if remaining <= rank:
+                break
+            index -= 1
+        return min(high, max(low, bin_value(index)))
+
+    def result(self):
+        """{'min', 'avg', 'max', 'p95'} of the window, or None if it is empty"""
+        if not self.samples:
+            return None
+        return {
+            'min': self.lows[0][1],
+            'avg': round(self.total / len(self.samples), 1),
+            'max': self.highs[0][1],
+            'p95': round(self.quantile(QUANTILE), 1),
+        }
+
+class WindowedAggregates:
+    """Rolling aggregates of several metrics over several windows
+
+    Every snapshot is fed in, so a stat sampled less often than the
+    snapshots are published counts once per snapshot, weighting each
+    value by how long it was current. Missing values are skipped.
+    """
+
+    def __init__(self, windows, metrics):
+        self.windows = {seconds: {metric: RollingWindow(seconds) for metric in metrics}
+                        for seconds in windows}
+        self.metrics = metrics
+        self.labels = {seconds: window_label(seconds) for seconds in windows}
+
+    def update(self, stats, now):
+        """Feed one sample taken at monotonic time now
+
+        Returns {window label: {metric: {'min', 'avg', 'max', 'p95'}}},
+        leaving out metrics with no samples in a window.
+        """
+        values = {}
+        for metric in self.metrics:
+            value = stats.get(metric)
+            if value is not None and not math.isnan(value):
+                values[metric] = (value, bin_index(value))
+        result = {}
+        for seconds, windows in self.windows.items():
+            aggregates = {}
+            for metric, window in windows.items():
+                if metric in values:
+                    window.add(now, *values[metric])
+                else:
+                    window.expire(now)
+                aggregate = window.result()
+                if aggregate is not None:
+                    aggregates[metric] = aggregate
+            result[self.labels[seconds]] = aggregates
+        return result
@@ -0,0 +1,85 @@
+"""
+Threshold alerts with hysteresis, shared by temp_server.py and temp_monitor.py
+Rules come from the [alerts] section of config.ini
+"""
+
+from collections import namedtuple
+
+# Alert name -> snapshot field it watches. The order fixes each alert's
+# bit in the binary wire format: append new alerts, never reorder.
+ALERT_FIELDS = {
+    'temp': 'temp',
+    'cpu': 'cpu_percent',
+    'ram': 'ram_percent',
+    'disk': 'disk_percent',
+}
+ALERT_NAMES = tuple(ALERT_FIELDS)
+
+# 'raise_at, clear_at' used when config.ini has no setting for an alert
+DEFAULT_LEVELS = {
+    'temp': '80, 75',
+    'cpu': '95, 85',
+    'ram': '90, 85',
+    'disk': '90, 85',
+}
+
+# Raised when field >= raise_at, cleared once it drops below clear_at
+Rule = namedtuple('Rule', 'name field raise_at clear_at')
+
+def parse_rules(config):
+    """Read alert rules from [alerts] as 'name = raise_at, clear_at'
+
+    Alerts missing from config.ini use DEFAULT_LEVELS; an empty value
+    disables one. clear_at defaults to raise_at when only one number is
+    given.
+    """
+    rules = []
+    for name in ALERT_NAMES:
+        value = config.get('alerts', name, fallback=DEFAULT_LEVELS[name]).strip()
+        if not value:
+            continue
+        levels = [float(level) for level in value.split(',')]
+        raise_at = levels[0]
+        clear_at = levels[1] if len(levels) > 1 else raise_at
+        rules.append(Rule(name, ALERT_FIELDS[name], raise_at, min(clear_at, raise_at)))
+    return rules
+
+class AlertState:
+    """Evaluate rules against one node's samples as they arrive
+
+    An alert is raised once its field has been at or above raise_at for
+    min_duration seconds, and cleared as soon as it drops below clear_at.
+    A missing value leaves an alert as it is. Each update() is O(rules).
+    """
+
+    def __init__(self, rules, min_duration=0):
+        self.rules = rules
+        self.min_duration = min_duration
+        self.active = set()
+        self.exceeded_since = {}  # Rule name -> monotonic time first seen high
+
+    def update(self, stats, now):
+        """Feed one sample taken at monotonic time now; return active alert names"""
+        for rule in self.rules:
+            value = stats.get(rule.field)
+            if value is None:
+                self.exceeded_since.pop(rule.name, None)
+            elif rule.name in self.active:
+                if value < rule.clear_at:
+                    self.active.discard(rule.name)
+            elif value >= rule.raise_at:
+                since = self.exceeded_since.setdefault(rule.name, now)
+                if now - since >= self.min_duration:
+                    self.active.add(rule.name)
+                    del self.exceeded_since[rule.name]
+            else:
+                self.exceeded_since.pop(rule.name, None)
+        return [name for name in ALERT_NAMES if name in self.active]
+
+def alert_mask(names):
+    """Pack alert names into a bitmask in ALERT_NAMES order"""
+    return sum(1 << bit for bit, name in enumerate(ALERT_NAMES) if name in names)
+
+def alert_names(mask):
+    """Unpack a bitmask from alert_mask()"""
+    return [name for bit, name in enumerate(ALERT_NAMES) if mask & (1 << bit)]
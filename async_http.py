@@ -0,0 +1,143 @@
+"""
+Minimal asyncio HTTP/1.1 server for small GET-only JSON endpoints
+One event loop, keep-alive connections, no threads and no framework
+"""
+
+import asyncio
+import json
+from collections import namedtuple
+from urllib.parse import parse_qsl
+
+# Largest request head (request line plus headers) accepted
+MAX_HEAD_BYTES = 16 * 1024
+# Largest request body read and discarded to keep a connection alive;
+# the connection is closed after a larger or chunked one instead
+MAX_BODY_BYTES = 64 * 1024
+
+REASONS = {
+    200: 'OK',
+    304: 'Not Modified',
+    400: 'Bad Request',
+    404: 'Not Found',
+    405: 'Method Not Allowed',
+    431: 'Request Header Fields Too Large',
+    500: 'Internal Server Error',
+    503: 'Service Unavailable',
+}
+
+# args: query parameters (first value of each); headers: lower-case names
+Request = namedtuple('Request', 'method path args headers')
+
+def json_response(status, data, headers=None):
+    """(status, headers, body) for a JSON body"""
+    return status, dict(headers or {}, **{'Content-Type': 'application/json'}), json.dumps(data).encode()
+
+def parse_head(head):
+    """Parse a request head into a Request, or raise ValueError"""
+    lines = head.decode('latin-1').split('\r\n')
+    method, target, version = lines[0].split(' ', 2)
+    path, _, query = target.partition('?')
+    headers = {}
+    for line in lines[1:]:
+        if line:
+            name, _, value = line.partition(':')
+            headers[name.strip().lower()] = value.strip()
+    args = {}
+    for name, value in parse_qsl(query, keep_blank_values=True):
+        args.setdefault(name, value)
+    return Request(method, path, args, headers), version
+
+def body_length(request):
+    """Bytes of request body to discard, or None if the connection must close"""
+    if 'transfer-encoding' in request.headers:
+        return None
+    try:
+        length = int(request.headers.get('content-length', 0))
+    except ValueError:
+        return None
+    return length if 0 <= length <= MAX_BODY_BYTES else None
+
+def encode_response(status, headers, body, keep_alive, version='HTTP/1.1'):
+    """Serialize a response to a request of `version`, head and body in one buffer"""
+    lines = [f"HTTP/1.1 {status} {REASONS.get(status, '')}"]
+    lines.extend(f"{name}: {value}" for name, value in headers.items())
+    lines.append(f"Content-Length: {len(body)}")
+    if not keep_alive:
+        lines.append("Connection: close")
+    elif version == 'HTTP/1.0':
+        # HTTP/1.0 clients close unless told the connection persists
+        lines.append("Connection: keep-alive")
+    return ('\r\n'.join(lines) + '\r\n\r\n').encode('latin-1') + body
+
+class AsyncHTTPServer:
+    """Serve routes {path: handler(request) -> (status, headers, body)}
+
+    Handlers run on the event loop and must not block. Only GET and HEAD
+    are accepted; a request body is read and ignored. Connections are kept
+    alive until the client closes them or asks to, so pollers pay for the
+    TCP handshake once. on_request, if given, is called as
+    on_request(path, seconds) after each routed request.
+    """
+
+    def __init__(self, routes, on_request=None):
+        self.routes = routes
+        self.on_request = on_request
+
+    def respond(self, request):
+        handler = self.routes.get(request.path)
+        if handler is None:
+            return json_response(404, {'error': 'Not found'})
+        if request.method not in ('GET', 'HEAD'):
+            return json_response(405, {'error': 'Method not allowed'}, {'Allow': 'GET, HEAD'})
+        try:
+            return handler(request)
+        except Exception as e:
+            print(f"Error handling {request.path}: {e}")
+            return json_response(500, {'error': 'Internal server error'})
+
+    async def handle_connection(self, reader, writer):
+        try:
+            while True:
+                try:
+                    head = await reader.readuntil(b'\r\n\r\n')
+                except asyncio.LimitOverrunError:
+                    writer.write(encode_response(*json_response(431, {'error': 'Request head too large'}), False))
+                    break
+                start = asyncio.get_running_loop().time()
+                try:
+                    request, version = parse_head(head)
+                except ValueError:
+                    writer.write(encode_response(*json_response(400, {'error': 'Malformed request'}), False))
+                    break
+                connection = request.headers.get('connection', '').lower()
+                keep_alive = connection != 'close' if version == 'HTTP/1.1' else connection == 'keep-alive'
+                # Skip the body so the next request starts where expected
+                length = body_length(request)
+                if length is None:
+                    keep_alive = False
+                elif length:
+                    await reader.readexactly(length)
+                status, headers, body = self.respond(request)
+                response = encode_response(status, headers, body, keep_alive, version)
+                if request.method == 'HEAD':
+                    response = response[:len(response) - len(body)]
+                writer.write(response)
+                await writer.drain()
+                if self.on_request is not None and request.path in self.routes:
+                    self.on_request(request.path, asyncio.get_running_loop().time() - start)
+                if not keep_alive:
+                    break
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+
+    async def serve(self, host, port):
+        server = await asyncio.start_server(self.handle_connection, host, port,
+                                            limit=MAX_HEAD_BYTES, backlog=1024)
+        async with server:
+            await server.serve_forever()
+
+    def run(self, host, port):
+        """Serve forever on the current thread"""
+        asyncio.run(self.serve(host, port))
@@ -0,0 +1,481 @@
+#!/usr/bin/env python3
+"""
+Offline benchmark for the temp_monitor poll-render pipeline
+Runs fake stat servers and an in-memory SSD1306 so no cluster or display is needed
+
+Usage:
+  python3 benchmark.py --nodes 3 --cycles 50 --latency-ms 5 --jitter-ms 2 \\
+      --failure-rate 0.05 --output bench.json
+  python3 benchmark.py --suite collector --samples 2000
+  python3 benchmark.py --suite server --clients 1,10,100 --duration 5
+"""
+
+import argparse
+import asyncio
+import contextlib
+import io
+import json
+import logging
+import multiprocessing
+import os
+import platform
+import random
+import socket
+import subprocess
+import sys
+import time
+import tracemalloc
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import wire
+
+# I2C clock used to estimate bus time from bytes written (9 bits per byte)
+I2C_CLOCK_HZ = 100_000
+
+class FakeI2CDevice:
+    """Stand-in for adafruit_bus_device.I2CDevice that counts traffic"""
+
+    def __init__(self):
+        self.bytes_written = 0
+        self.transactions = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def write(self, data):
+        self.bytes_written += len(data)
+        self.transactions += 1
+
+class FakeSSD1306:
+    """In-memory stand-in for adafruit_ssd1306.SSD1306_I2C"""
+
+    def __init__(self, width, height):
+        self.width = width
+        self.height = height
+        self.page_addressing = False
+        self.i2c_device = FakeI2CDevice()
+        self.buffer = bytearray((height // 8) * width + 1)
+        self.buffer[0] = 0x40
+
+    def fill(self, color):
+        self.buffer[1:] = bytes([0xFF if color else 0]) * (len(self.buffer) - 1)
+
+    def image(self, image):
+        pass
+
+    def show(self):
+        with self.i2c_device:
+            self.i2c_device.write(self.buffer)
+
+def fake_stats(seq):
+    """Plausible stats snapshot that drifts a little every sample"""
+    return {
+        'temp': 45 + random.uniform(-5, 15),
+        'cpu_percent': random.uniform(0, 100),
+        'load_avg': random.uniform(0, 4),
+        'ram_percent': random.uniform(20, 60),
+        'ram_used_mb': random.uniform(800, 2400),
+        'ram_total_mb': 3906.0,
+        'net_sent_mb': seq * 0.5,
+        'net_recv_mb': seq * 1.5,
+        'net_send_rate_kbs': random.uniform(0, 2000),
+        'net_recv_rate_kbs': random.uniform(0, 2000),
+        'disk_percent': 42.0,
+        'disk_free_gb': 17.3,
+        'uptime_hours': 30 + seq / 3600,
+        'seq': seq,
+        'timestamp': time.time(),
+    }
+
+def make_handler(latency, jitter, failure_rate):
+    """Build a request handler class with the given network behaviour"""
+
+    class FakeNodeHandler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+        disable_nagle_algorithm = True
+        seq = 0
+
+        def do_GET(self):
+            time.sleep(max(0.0, latency + random.uniform(-jitter, jitter)))
+            if random.random() < failure_rate:
+                self.send_error(503)
+                return
+            path = self.path.split('?')[0]
+            if path == '/health':
+                body, content_type = b'{"status": "ok"}', 'application/json'
+            elif path == '/stats':
+                FakeNodeHandler.seq += 1
+                stats = fake_stats(FakeNodeHandler.seq)
+                version = wire.negotiate(self.headers.get('Accept', ''))
+                if version is not None:
+                    body, content_type = wire.encode(stats, version), wire.media_type(version)
+                else:
+                    body, content_type = json.dumps(stats).encode(), 'application/json'
+            else:
+                self.send_error(404)
+                return
+            self.send_response(200)
+            self.send_header('Content-Type', content_type)
+            self.send_header('Content-Length', str(len(body)))
+            self.send_header('ETag', f'"{FakeNodeHandler.seq}"')
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    return FakeNodeHandler
+
+def serve_fake_nodes(hosts, port, latency, jitter, failure_rate):
+    """Run one fake stats server per loopback address (child process)"""
+    servers = []
+    for host in hosts:
+        server = ThreadingHTTPServer((host, port), make_handler(latency, jitter, failure_rate))
+        server.daemon_threads = True
+        servers.append(server)
+    with ThreadPoolExecutor(max_workers=len(servers)) as pool:
+        for server in servers:
+            pool.submit(server.serve_forever)
+
+def wait_for_servers(hosts, port, timeout=5):
+    """Block until every fake server accepts connections"""
+    deadline = time.monotonic() + timeout
+    for host in hosts:
+        while True:
+            try:
+                socket.create_connection((host, port), timeout=0.2).close()
+                break
+            except OSError:
+                if time.monotonic() > deadline:
+                    raise RuntimeError(f"Fake node {host}:{port} did not start")
+                time.sleep(0.05)
+
+def percentiles(samples):
+    """Summary statistics for a list of numbers"""
+    if not samples:
+        return None
+    ordered = sorted(samples)
+    def pick(p):
+        return ordered[min(len(ordered) - 1, int(p / 100 * len(ordered)))]
+    return {
+        'p50': pick(50),
+        'p90': pick(90),
+        'p99': pick(99),
+        'max': ordered[-1],
+        'mean': sum(ordered) / len(ordered),
+    }
+
+def git_commit():
+    """Current commit hash, if the benchmark runs inside the git checkout"""
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True,
+                              text=True, cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip()
+    except OSError:
+        return None
+
+class PhaseTimer:
+    """Wrap a function and record how long each call takes
+
+    Calls for which skip(*args) is true run untimed, so calls that return
+    without doing the work don't pull the percentiles down.
+    """
+
+    def __init__(self, func, skip=None):
+        self.func = func
+        self.skip = skip
+        self.samples = []
+
+    def __call__(self, *args):
+        if self.skip is not None and self.skip(*args):
+            return self.func(*args)
+        start = time.perf_counter()
+        try:
+            return self.func(*args)
+        finally:
+            self.samples.append((args, (time.perf_counter() - start) * 1000))
+
+def run_benchmark(args):
+    hosts = [f"127.0.0.{i + 2}" for i in range(args.nodes)]
+    server_process = multiprocessing.Process(
+        target=serve_fake_nodes,
+        args=(hosts, args.port, args.latency_ms / 1000, args.jitter_ms / 1000, args.failure_rate),
+        daemon=True,
+    )
+    server_process.start()
+    wait_for_servers(hosts, args.port)
+
+    # Importing temp_monitor has no hardware side effects; wire it to the fakes
+    import temp_monitor
+    from framebuffer import DirtyPageWriter
+    temp_monitor.OTHER_NODES[:] = hosts
+    temp_monitor.NODE_PORT = args.port
+    temp_monitor.FETCH_DEADLINE = args.deadline
+    temp_monitor.fetch_pool = ThreadPoolExecutor(max_workers=args.nodes + 1)
+    display = FakeSSD1306(temp_monitor.DISPLAY_WIDTH, temp_monitor.DISPLAY_HEIGHT)
+    temp_monitor.display = display
+    temp_monitor.frame_writer = DirtyPageWriter(display)
+    local_timer = PhaseTimer(temp_monitor.get_local_stats)
+    # Nodes the circuit breaker skips are not fetched, so not timed
+    remote_timer = PhaseTimer(temp_monitor.get_remote_stats, skip=temp_monitor.breaker_open)
+    temp_monitor.get_local_stats = local_timer
+    temp_monitor.get_remote_stats = remote_timer
+
+    screens = list(temp_monitor.SCREENS) if args.screen == 'all' else [int(args.screen)]
+    results = {
+        'cycle_ms': [], 'fetch_ms': [], 'render_ms': [], 'cpu_ms': [],
+        'i2c_bytes': [], 'i2c_transactions': [], 'offline_nodes': 0,
+    }
+
+    def cycle(index):
+        screen = screens[(index // args.cycles_per_screen) % len(screens)]
+        bytes_before = display.i2c_device.bytes_written
+        transactions_before = display.i2c_device.transactions
+        cpu_start = time.process_time()
+        start = time.perf_counter()
+        all_stats = temp_monitor.fetch_all_stats()
+        fetched = time.perf_counter()
+        temp_monitor.update_sparklines(all_stats)
+        temp_monitor.render_screen(screen, all_stats)
+        end = time.perf_counter()
+        results['cycle_ms'].append((end - start) * 1000)
+        results['fetch_ms'].append((fetched - start) * 1000)
+        results['render_ms'].append((end - fetched) * 1000)
+        results['cpu_ms'].append((time.process_time() - cpu_start) * 1000)
+        results['i2c_bytes'].append(display.i2c_device.bytes_written - bytes_before)
+        results['i2c_transactions'].append(display.i2c_device.transactions - transactions_before)
+        results['offline_nodes'] += sum(1 for stats in all_stats.values() if stats is None)
+
+    # temp_monitor reports errors on stdout; keep them out of the results
+    with contextlib.redirect_stdout(io.StringIO()):
+        for index in range(args.warmup):
+            cycle(index)
+        for key in results:
+            results[key] = 0 if key == 'offline_nodes' else []
+        local_timer.samples.clear()
+        remote_timer.samples.clear()
+        for index in range(args.cycles):
+            cycle(index)
+
+        # Allocation pass, separate so tracing overhead doesn't skew timings
+        alloc_peaks = []
+        tracemalloc.start()
+        for index in range(args.alloc_cycles):
+            tracemalloc.reset_peak()
+            baseline = tracemalloc.get_traced_memory()[0]
+            temp_monitor.render_screen(screens[index % len(screens)], temp_monitor.fetch_all_stats())
+            alloc_peaks.append((tracemalloc.get_traced_memory()[1] - baseline) / 1024)
+        tracemalloc.stop()
+
+    server_process.terminate()
+
+    per_node = {}
+    for (node,), elapsed in remote_timer.samples:
+        per_node.setdefault(node, []).append(elapsed)
+
+    bus_ms = [b * 9 / I2C_CLOCK_HZ * 1000 for b in results['i2c_bytes']]
+    return {
+        'benchmark': 'poll-render',
+        'timestamp': time.time(),
+        'git_commit': git_commit(),
+        'python': platform.python_version(),
+        'machine': platform.machine(),
+        'config': vars(args),
+        'cycles': args.cycles,
+        'cycle_ms': percentiles(results['cycle_ms']),
+        'phases_ms': {
+            'local_stats': percentiles([ms for _, ms in local_timer.samples]),
+            'remote_fetch': percentiles([ms for _, ms in remote_timer.samples]),
+            'fetch_all': percentiles(results['fetch_ms']),
+            'render_and_write': percentiles(results['render_ms']),
+        },
+        'per_node_fetch_ms': {node: percentiles(samples) for node, samples in per_node.items()},
+        'cpu_ms_per_cycle': percentiles(results['cpu_ms']),
+        'i2c': {
+            'bytes_per_cycle': percentiles(results['i2c_bytes']),
+            'transactions_per_cycle': percentiles(results['i2c_transactions']),
+            'est_bus_ms_per_cycle': percentiles(bus_ms),
+        },
+        'alloc_peak_kb_per_cycle': percentiles(alloc_peaks),
+        'offline_node_samples': results['offline_nodes'],
+    }
+
+def run_collector_benchmark(args):
+    """Compare the per-sample cost of the psutil calls with collector.Collector"""
+    import psutil
+    from collector import Collector
+
+    def psutil_sample():
+        # The calls the old get_stats() made for one sample
+        psutil.cpu_percent(interval=None)
+        psutil.getloadavg()
+        psutil.virtual_memory()
+        psutil.net_io_counters()
+        psutil.net_io_counters()
+        psutil.disk_usage('/')
+        psutil.boot_time()
+
+    collector = Collector()
+    results = {}
+    for name, sample in (('psutil', psutil_sample), ('collector', collector.sample)):
+        timings = []
+        cpu_start = time.process_time()
+        for _ in range(args.samples):
+            start = time.perf_counter()
+            sample()
+            timings.append((time.perf_counter() - start) * 1_000_000)
+        results[name] = {
+            'us_per_sample': percentiles(timings),
+            'cpu_us_per_sample': (time.process_time() - cpu_start) / args.samples * 1_000_000,
+        }
+    results['speedup_p50'] = (results['psutil']['us_per_sample']['p50']
+                              / results['collector']['us_per_sample']['p50'])
+    return {
+        'benchmark': 'collector',
+        'timestamp': time.time(),
+        'git_commit': git_commit(),
+        'python': platform.python_version(),
+        'machine': platform.machine(),
+        'config': vars(args),
+        **results,
+    }
+
+def serve_stats_server(kind, port):
+    """Run temp_server.py with the given server on port (child process)"""
+    sys.stdout = open(os.devnull, 'w')
+    # waitress warns about every queued request under load
+    logging.getLogger('waitress').setLevel(logging.ERROR)
+    import temp_server
+    temp_server.NODE_PORT = port
+    temp_server.SERVER = kind
+    temp_server.start_sampler()
+    temp_server.run_server()
+
+def wait_for_stats(port, timeout=10):
+    """Block until /stats on loopback answers with a snapshot"""
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            with socket.create_connection(('127.0.0.1', port), timeout=0.5) as sock:
+                sock.sendall(b"GET /stats HTTP/1.1\r\nHost: 127.0.0.1\r\nConnection: close\r\n\r\n")
+                if sock.recv(64).startswith(b"HTTP/1.1 200"):
+                    return
+        except OSError:
+            pass
+        if time.monotonic() > deadline:
+            raise RuntimeError(f"Stats server on port {port} did not start")
+        time.sleep(0.1)
+
+async def load_client(port, request, deadline, latencies, errors):
+    """Send requests back to back on one keep-alive connection until deadline"""
+    reader, writer = await asyncio.open_connection('127.0.0.1', port)
+    try:
+        while time.perf_counter() < deadline:
+            start = time.perf_counter()
+            writer.write(request)
+            head = await reader.readuntil(b'\r\n\r\n')
+            length = 0
+            for line in head.split(b'\r\n'):
+                if line.lower().startswith(b'content-length:'):
+                    length = int(line.split(b':', 1)[1])
+            await reader.readexactly(length)
+            latencies.append((time.perf_counter() - start) * 1000)
+            if not head.startswith(b'HTTP/1.1 200'):
+                errors.append(head.split(b'\r\n', 1)[0].decode())
+    finally:
+        writer.close()
+
+async def run_load(port, path, clients, duration):
+    """Drive `clients` concurrent connections for duration seconds"""
+    request = f"GET {path} HTTP/1.1\r\nHost: 127.0.0.1\r\n\r\n".encode()
+    latencies, errors = [], []
+    deadline = time.perf_counter() + duration
+    await asyncio.gather(*(load_client(port, request, deadline, latencies, errors)
+                           for _ in range(clients)))
+    return {
+        'requests': len(latencies),
+        'requests_per_second': len(latencies) / duration,
+        'latency_ms': percentiles(latencies),
+        'errors': len(errors),
+    }
+
+def run_server_benchmark(args):
+    """Load-test /stats on each stats server at increasing client counts"""
+    clients = [int(count) for count in args.clients.split(',')]
+    results = {}
+    for offset, kind in enumerate(args.servers.split(',')):
+        port = args.port + offset
+        server_process = multiprocessing.Process(target=serve_stats_server, args=(kind, port), daemon=True)
+        server_process.start()
+        try:
+            wait_for_stats(port)
+            results[kind] = {}
+            for count in clients:
+                results[kind][str(count)] = asyncio.run(run_load(port, args.path, count, args.duration))
+        finally:
+            server_process.terminate()
+            server_process.join()
+    return {
+        'benchmark': 'server',
+        'timestamp': time.time(),
+        'git_commit': git_commit(),
+        'python': platform.python_version(),
+        'machine': platform.machine(),
+        'cpus': os.cpu_count(),
+        'config': vars(args),
+        'servers': results,
+    }
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--suite', choices=('pipeline', 'collector', 'server'), default='pipeline',
+                        help='pipeline: full poll-render cycle; collector: per-sample stats cost; '
+                             'server: /stats load test of each stats server')
+    parser.add_argument('--samples', type=int, default=2000,
+                        help='samples per collector in the collector suite (default: 2000)')
+    parser.add_argument('--nodes', type=int, default=3, help='fake remote nodes (default: 3)')
+    parser.add_argument('--cycles', type=int, default=50, help='measured cycles (default: 50)')
+    parser.add_argument('--warmup', type=int, default=3, help='unmeasured warm-up cycles (default: 3)')
+    parser.add_argument('--alloc-cycles', type=int, default=5,
+                        help='cycles traced for allocations (default: 5)')
+    parser.add_argument('--latency-ms', type=float, default=5.0, help='fake node latency (default: 5)')
+    parser.add_argument('--jitter-ms', type=float, default=2.0, help='latency jitter +/- (default: 2)')
+    parser.add_argument('--failure-rate', type=float, default=0.0,
+                        help='fraction of requests answered with 503 (default: 0)')
+    parser.add_argument('--deadline', type=float, default=2.5, help='fetch deadline seconds (default: 2.5)')
+    parser.add_argument('--screen', default='all', help="screen to render, or 'all' (default: all)")
+    parser.add_argument('--cycles-per-screen', type=int, default=5,
+                        help="cycles before switching screens with --screen all (default: 5)")
+    parser.add_argument('--servers', default='waitress,asyncio',
+                        help='stats servers to load-test in the server suite (default: waitress,asyncio)')
+    parser.add_argument('--clients', default='1,10,100',
+                        help='concurrent keep-alive clients per load test (default: 1,10,100)')
+    parser.add_argument('--duration', type=float, default=5.0,
+                        help='seconds per load test (default: 5)')
+    parser.add_argument('--path', default='/stats', help='path requested in the server suite (default: /stats)')
+    parser.add_argument('--port', type=int, default=5600,
+                        help='port for fake nodes, or the first stats server (default: 5600)')
+    parser.add_argument('--output', help='write JSON results to this file instead of stdout')
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    args = parse_args(argv)
+    if args.suite == 'collector':
+        report = run_collector_benchmark(args)
+    elif args.suite == 'server':
+        report = run_server_benchmark(args)
+    else:
+        report = run_benchmark(args)
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(text + '\n')
+        print(f"Results written to {args.output}", file=sys.stderr)
+    else:
+        print(text)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,281 @@
+"""
+Lean Linux stats collector shared by temp_server.py and temp_monitor.py
+Reads /proc and /sys directly through file descriptors kept open between samples
+"""
+
+import glob
+import os
+import time
+
+THERMAL_PATH = '/sys/class/thermal/thermal_zone0/temp'
+THERMAL_ZONES = '/sys/class/thermal/thermal_zone*'
+# Interfaces without a device behind them (lo, docker0, veth*, bridges)
+VIRTUAL_NET = '/sys/devices/virtual/net'
+
+# Per-core, per-interface and per-zone breakdowns; left out of /stats
+# unless a client asks for them
+DETAIL_FIELDS = ('cpu_cores', 'interfaces', 'thermal_zones')
+
+class ProcFile:
+    """A /proc or /sys file kept open and re-read from offset 0 with pread
+
+    Each read regenerates the file's contents without the open()/close()
+    and Python file-object overhead of reopening it. size is only the
+    first guess: a read that fills the buffer is repeated with one twice
+    as large, so files that grow (more interfaces, more cores) are never
+    cut short.
+    """
+
+    def __init__(self, path, size=4096):
+        self.path = path
+        self.size = size
+        self.fd = os.open(path, os.O_RDONLY)
+
+    def read(self):
+        while True:
+            data = os.pread(self.fd, self.size, 0)
+            if len(data) < self.size:
+                return data
+            self.size *= 2
+
+    def close(self):
+        os.close(self.fd)
+
+def open_optional(path, size=64):
+    """Open a ProcFile, or return None if the file does not exist"""
+    try:
+        return ProcFile(path, size)
+    except OSError:
+        return None
+
+def open_thermal_zones():
+    """Open every thermal zone's temp file, keyed by its type name"""
+    zones = {}
+    for zone_dir in sorted(glob.glob(THERMAL_ZONES)):
+        zone = open_optional(os.path.join(zone_dir, 'temp'))
+        if zone is None:
+            continue
+        try:
+            with open(os.path.join(zone_dir, 'type')) as f:
+                name = f.read().strip()
+        except OSError:
+            name = os.path.basename(zone_dir)
+        if name in zones:
+            name = f"{name}-{os.path.basename(zone_dir)}"
+        zones[name] = zone
+    return zones
+
+def is_virtual_interface(name):
+    """True for loopback, bridge, veth and other interfaces with no hardware"""
+    return os.path.exists(os.path.join(VIRTUAL_NET, name))
+
+def read_millidegrees(proc_file):
+    """Read a thermal zone file as Celsius, or None if it can't be read"""
+    try:
+        return int(proc_file.read()) / 1000.0
+    except (OSError, ValueError):
+        return None
+
+class Collector:
+    """Collect node stats into a reused record, all at once or group by group
+
+    Constants (boot time, total RAM) are read once. CPU usage and network
+    rates are computed against the previous sample of their group, so the
+    first sample reports 0 for both. Network totals and rates cover
+    physical interfaces only, and the totals add up per-interface deltas
+    so they never go backwards when an interface disappears or resets.
+    Each file is read once per sample and provides both the totals and
+    the per-core, per-interface and per-zone details in cpu_cores,
+    interfaces and thermal_zones. sampled_at holds the Unix time each
+    field was last refreshed.
+    """
+
+    FIELDS = (
+        'temp', 'cpu_percent', 'load_avg',
+        'ram_percent', 'ram_used_mb', 'ram_total_mb',
+        'net_sent_mb', 'net_recv_mb', 'net_sent_bytes', 'net_recv_bytes',
+        'net_send_rate_kbs', 'net_recv_rate_kbs',
+        'disk_percent', 'disk_free_gb', 'uptime_hours',
+        'cpu_cores', 'interfaces', 'thermal_zones',
+    )
+
+    # Fields refreshed by each sampling group; ram_total_mb is read once
+    GROUPS = {
+        'temp': ('temp', 'thermal_zones'),
+        'cpu': ('cpu_percent', 'cpu_cores', 'load_avg'),
+        'memory': ('ram_percent', 'ram_used_mb'),
+        'network': ('net_sent_mb', 'net_recv_mb', 'net_sent_bytes', 'net_recv_bytes',
+                    'net_send_rate_kbs', 'net_recv_rate_kbs', 'interfaces'),
+        'disk': ('disk_percent', 'disk_free_gb'),
+        'uptime': ('uptime_hours',),
+    }
+
+    def __init__(self, thermal_path=THERMAL_PATH, disk_path='/'):
+        self.stat = ProcFile('/proc/stat', 8192)
+        self.meminfo = ProcFile('/proc/meminfo', 256)
+        self.netdev = ProcFile('/proc/net/dev', 16384)
+        self.loadavg = ProcFile('/proc/loadavg', 64)
+        self.thermal = open_optional(thermal_path)
+        self.thermal_zones = open_thermal_zones()
+        self.disk_path = disk_path
+
+        with open('/proc/stat', 'rb') as f:
+            for line in f:
+                if line.startswith(b'btime'):
+                    self.boot_time = int(line.split()[1])
+                    break
+        meminfo = self.parse_meminfo()
+        self.ram_total_kb = meminfo[b'MemTotal:']
+
+        self.record = dict.fromkeys(self.FIELDS)
+        self.record['ram_total_mb'] = self.ram_total_kb / 1024
+        self.sampled_at = dict.fromkeys(self.FIELDS)
+        self.sampled_at['ram_total_mb'] = time.time()
+        self.last_cpu = self.read_cpu_times()
+        self.virtual_interfaces = {}  # Interface name -> is_virtual_interface()
+        counters = self.read_net_bytes()
+        self.last_net = (counters, time.monotonic())
+        physical = [bytes_ for name, bytes_ in counters.items() if not self.is_virtual(name)]
+        self.net_totals = [sum(sent for sent, _ in physical), sum(received for _, received in physical)]
+        self.samplers = {
+            'temp': self.sample_temp,
+            'cpu': self.sample_cpu,
+            'memory': self.sample_memory,
+            'network': self.sample_network,
+            'disk': self.sample_disk,
+            'uptime': self.sample_uptime,
+        }
+
+    def is_virtual(self, name):
+        """is_virtual_interface(), checked once per interface name"""
+        virtual = self.virtual_interfaces.get(name)
+        if virtual is None:
+            virtual = self.virtual_interfaces[name] = is_virtual_interface(name)
+        return virtual
+
+    def parse_meminfo(self):
+        """Return the leading /proc/meminfo lines as {b'Key:': kB}"""
+        values = {}
+        for line in self.meminfo.read().splitlines():
+            parts = line.split()
+            if len(parts) >= 2:
+                values[parts[0]] = int(parts[1])
+        return values
+
+    def read_cpu_times(self):
+        """Return {'cpu': (busy, total), 'cpu0': ..., ...} jiffies from /proc/stat"""
+        times = {}
+        for line in self.stat.read().split(b'\n'):
+            if not line.startswith(b'cpu'):
+                break
+            fields = line.split()
+            values = [int(value) for value in fields[1:9]]
+            total = sum(values)
+            idle = values[3] + values[4]  # idle + iowait
+            times[fields[0].decode()] = (total - idle, total)
+        return times
+
+    def read_net_bytes(self):
+        """Return {interface: (sent, received)} bytes from /proc/net/dev"""
+        counters = {}
+        for line in self.netdev.read().splitlines()[2:]:
+            name, colon, fields = line.partition(b':')
+            fields = fields.split()
+            # Skip anything that isn't a whole interface line
+            if not colon or len(fields) < 9 or not fields[0].isdigit() or not fields[8].isdigit():
+                continue
+            counters[name.strip().decode()] = (int(fields[8]), int(fields[0]))
+        return counters
+
+    def read_temp(self):
+        """CPU temperature in Celsius, or None if there is no thermal zone"""
+        if self.thermal is None:
+            return None
+        return read_millidegrees(self.thermal)
+
+    def sample(self, groups=None):
+        """Refresh the given groups (None: all) and return the record
+
+        Fields of other groups keep their last values, so an empty list
+        refreshes nothing. Copy the record before keeping it.
+        """
+        now = time.time()
+        for group in self.GROUPS if groups is None else groups:
+            self.samplers[group]()
+            for field in self.GROUPS[group]:
+                self.sampled_at[field] = now
+        return self.record
+
+    def sample_temp(self):
+        record = self.record
+        record['temp'] = self.read_temp()
+        record['thermal_zones'] = {name: read_millidegrees(zone)
+                                   for name, zone in self.thermal_zones.items()}
+
+    def sample_cpu(self):
+        record = self.record
+        cpu_times = self.read_cpu_times()
+        cores = {}
+        for name, (busy, total) in cpu_times.items():
+            last_busy, last_total = self.last_cpu.get(name, (busy, total))
+            percent = round(100.0 * (busy - last_busy) / (total - last_total), 1) if total > last_total else 0.0
+            if name == 'cpu':
+                record['cpu_percent'] = percent
+            else:
+                cores[name[3:]] = percent
+        record['cpu_cores'] = cores
+        self.last_cpu = cpu_times
+
+        record['load_avg'] = float(self.loadavg.read().split(None, 1)[0])
+
+    def sample_memory(self):
+        record = self.record
+        meminfo = self.parse_meminfo()
+        available = meminfo.get(b'MemAvailable:', meminfo.get(b'MemFree:', 0))
+        used_kb = self.ram_total_kb - available
+        record['ram_percent'] = round(100.0 * used_kb / self.ram_total_kb, 1)
+        record['ram_used_mb'] = used_kb / 1024
+
+    def sample_network(self):
+        record = self.record
+        now = time.monotonic()
+        counters = self.read_net_bytes()
+        last_counters, last_time = self.last_net
+        elapsed = now - last_time
+        interfaces = {}
+        totals = self.net_totals
+        send_rate = recv_rate = 0.0
+        for name, (iface_sent, iface_received) in counters.items():
+            last_sent, last_received = last_counters.get(name, (iface_sent, iface_received))
+            # A counter that went down was reset (driver reload); count from zero
+            sent = iface_sent - last_sent if iface_sent >= last_sent else iface_sent
+            received = iface_received - last_received if iface_received >= last_received else iface_received
+            tx_kbs = sent / elapsed / 1024 if elapsed > 0 else 0.0
+            rx_kbs = received / elapsed / 1024 if elapsed > 0 else 0.0
+            interfaces[name] = {'tx_bytes': iface_sent, 'rx_bytes': iface_received,
+                                'tx_kbs': tx_kbs, 'rx_kbs': rx_kbs}
+            if not self.is_virtual(name):
+                totals[0] += sent
+                totals[1] += received
+                send_rate += tx_kbs
+                recv_rate += rx_kbs
+        self.last_net = (counters, now)
+        record['interfaces'] = interfaces
+        record['net_send_rate_kbs'] = send_rate
+        record['net_recv_rate_kbs'] = recv_rate
+        sent, received = totals
+        record['net_sent_bytes'] = sent
+        record['net_recv_bytes'] = received
+        record['net_sent_mb'] = sent / (1024 * 1024)
+        record['net_recv_mb'] = received / (1024 * 1024)
+
+    def sample_disk(self):
+        record = self.record
+        disk = os.statvfs(self.disk_path)
+        used = (disk.f_blocks - disk.f_bfree) * disk.f_frsize
+        free = disk.f_bavail * disk.f_frsize
+        record['disk_percent'] = round(100.0 * used / (used + free), 1) if used + free else 0.0
+        record['disk_free_gb'] = free / (1024 * 1024 * 1024)
+
+    def sample_uptime(self):
+        self.record['uptime_hours'] = (time.time() - self.boot_time) / 3600
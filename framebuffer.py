@@ -0,0 +1,102 @@
+"""
+Dirty-page framebuffer writer for SSD1306/SSD1309 I2C displays
+Sends only the pages (8-row bands) and column ranges that changed
+"""
+
+from PIL import Image
+
+# SSD1306 commands used for partial updates (horizontal addressing mode)
+SET_COL_ADDR = 0x21
+SET_PAGE_ADDR = 0x22
+CONTROL_CMD_STREAM = 0x00  # Co=0, D/C#=0: the rest of the transfer is commands
+CONTROL_DATA_STREAM = 0x40  # Co=0, D/C#=1: the rest of the transfer is GDDRAM data
+
+def image_to_pages(image, pages):
+    """Pack a 1-bit PIL image into SSD1306 page order
+
+    Returns a list with one bytes object per page, each holding one byte per
+    column with the top row of the band in bit 0. Rotating the image 90°
+    clockwise turns every column into a row whose packed bytes, read
+    right to left, are exactly those page bytes.
+    """
+    if image.mode != "1":
+        image = image.convert("1")
+    data = image.transpose(Image.Transpose.ROTATE_270).tobytes()
+    return [data[pages - 1 - page::pages] for page in range(pages)]
+
+def changed_columns(old, new):
+    """Return (first, last) column that differs between two pages, or None"""
+    if old == new:
+        return None
+    first = 0
+    while old[first] == new[first]:
+        first += 1
+    last = len(new) - 1
+    while old[last] == new[last]:
+        last -= 1
+    return first, last
+
+class DirtyPageWriter:
+    """Write PIL images to an SSD1306_I2C display, sending only changed bytes
+
+    Keeps the last frame sent. Each new frame is compared page by page, and
+    each changed page is sent as a single column window set with the SSD1306
+    addressing commands. Identical frames send nothing.
+    """
+
+    def __init__(self, display):
+        self.display = display
+        self.width = display.width
+        self.pages = display.height // 8
+        # Narrow displays use centered columns, as in adafruit_ssd1306.show()
+        self.col_offset = (128 - self.width) // 2 if self.width != 128 else 0
+        # Partial writes need horizontal addressing over I2C; otherwise fall back
+        self.partial = (hasattr(display, 'i2c_device')
+                        and not getattr(display, 'page_addressing', False))
+        self.last_pages = None
+        self.bytes_written = 0
+
+    def invalidate(self):
+        """Forget the last frame so the next show() rewrites everything"""
+        self.last_pages = None
+
+    def _write(self, data):
+        with self.display.i2c_device:
+            self.display.i2c_device.write(data)
+        self.bytes_written += len(data)
+
+    def show(self, image):
+        """Send the differences between image and the last frame sent
+
+        Returns the number of bytes written to the bus.
+        """
+        start_bytes = self.bytes_written
+        new_pages = image_to_pages(image, self.pages)
+
+        if not self.partial:
+            if new_pages != self.last_pages:
+                self.display.image(image)
+                self.display.show()
+                self.bytes_written += self.pages * self.width + 1
+                self.last_pages = new_pages
+            return self.bytes_written - start_bytes
+
+        buffer = self.display.buffer
+        for page, data in enumerate(new_pages):
+            if self.last_pages is None:
+                columns = (0, self.width - 1)
+            else:
+                columns = changed_columns(self.last_pages[page], data)
+                if columns is None:
+                    continue
+            first, last = columns
+            self._write(bytes((CONTROL_CMD_STREAM,
+                               SET_COL_ADDR, first + self.col_offset, last + self.col_offset,
+                               SET_PAGE_ADDR, page, page)))
+            self._write(bytes((CONTROL_DATA_STREAM,)) + data[first:last + 1])
+            # Keep the driver's own buffer in sync for fill()/show() elsewhere
+            offset = 1 + page * self.width
+            buffer[offset + first:offset + last + 1] = data[first:last + 1]
+
+        self.last_pages = new_pages
+        return self.bytes_written - start_bytes
@@ -0,0 +1,113 @@
+"""
+Fixed-memory ring buffer history of node stats
+One preallocated array per metric, downsampled into buckets on query
+"""
+
+import math
+import threading
+from array import array
+
+# Metrics kept in history (numeric fields of the /stats payload)
+METRICS = (
+    'temp',
+    'cpu_percent',
+    'load_avg',
+    'ram_percent',
+    'disk_percent',
+    'net_send_rate_kbs',
+    'net_recv_rate_kbs',
+)
+
+# Upper bound on buckets per query; larger ranges get a coarser step
+MAX_BUCKETS = 1000
+
+class RingHistory:
+    """Ring buffer of timestamped samples with a fixed memory footprint
+
+    Timestamps are stored as doubles and metric values as 32-bit floats in
+    preallocated arrays, so memory use is set by capacity alone (36 bytes
+    per sample with the default metrics). Missing values are stored as NaN.
+    """
+
+    def __init__(self, capacity, metrics=METRICS):
+        self.capacity = capacity
+        self.metrics = metrics
+        self.timestamps = array('d', bytes(8 * capacity))
+        self.values = {metric: array('f', bytes(4 * capacity)) for metric in metrics}
+        self.start = 0  # Slot of the oldest sample
+        self.count = 0
+        self.lock = threading.Lock()
+
+    def memory_bytes(self):
+        """Bytes held by the sample arrays"""
+        arrays = [self.timestamps, *self.values.values()]
+        return sum(a.itemsize * len(a) for a in arrays)
+
+    def oldest(self):
+        """Timestamp of the oldest sample held, or None if empty"""
+        with self.lock:
+            return self.timestamps[self.start] if self.count else None
+
+    def append(self, timestamp, stats):
+        """Add one sample, overwriting the oldest once full"""
+        with self.lock:
+            if self.count < self.capacity:
+                slot = (self.start + self.count) % self.capacity
+                self.count += 1
+            else:
+                slot = self.start
+                self.start = (self.start + 1) % self.capacity
+            self.timestamps[slot] = timestamp
+            for metric, values in self.values.items():
+                value = stats.get(metric)
+                values[slot] = math.nan if value is None else value
+
+    def _bisect(self, timestamp):
+        """Logical index of the first sample at or after timestamp"""
+        low, high = 0, self.count
+        while low < high:
+            mid = (low + high) // 2
+            if self.timestamps[(self.start + mid) % self.capacity] < timestamp:
+                low = mid + 1
+            else:
+                high = mid
+        return low
+
+    def _slice(self, values, first, last):
+        """Copy logical samples [first, last) of an array, unwrapping the ring"""
+        length = last - first
+        first = (self.start + first) % self.capacity
+        last = first + length
+        if last <= self.capacity:
+            return values[first:last]
+        return values[first:] + values[:last - self.capacity]
+
+    def buckets(self, metric, since, until, step):
+        """Downsample one metric over [since, until) into min/avg/max buckets
+
+        Returns (step, buckets). The step is widened if needed to stay within
+        MAX_BUCKETS. Buckets are located by binary search and reduced with
+        builtins over array slices, so no per-sample Python loop runs.
+        Buckets without samples are omitted.
+        """
+        step = max(step, (until - since) / MAX_BUCKETS)
+        values = self.values[metric]
+        result = []
+        with self.lock:
+            bucket_start = since
+            first = self._bisect(since)
+            while bucket_start < until and first < self.count:
+                bucket_end = min(bucket_start + step, until)
+                last = self._bisect(bucket_end)
+                if last > first:
+                    samples = self._slice(values, first, last)
+                    total = sum(samples)
+                    if math.isnan(total):
+                        samples = [value for value in samples if not math.isnan(value)]
+                        total = sum(samples)
+                    if samples:
+                        result.append({'t': bucket_start, 'min': min(samples),
+                                       'max': max(samples), 'avg': total / len(samples),
+                                       'count': len(samples)})
+                bucket_start, first = bucket_end, last
+        return step, result
@@ -0,0 +1,215 @@
+"""
+Durable append-only log of node stats in fixed-size binary records
+Written in batches, rotated by size and queried through mmap
+"""
+
+import contextlib
+import math
+import mmap
+import os
+import struct
+import threading
+import time
+from history import MAX_BUCKETS, METRICS
+
+# File header: magic, format version, number of metrics per record
+MAGIC = b'TP2M'
+LOG_VERSION = 1
+HEADER = struct.Struct('<4sHH')
+# Most unwritten records kept while the log can't be written (about 8 h at 1 s)
+MAX_PENDING_BYTES = 1024 * 1024
+
+class MetricsLog:
+    """Fixed-record log with size-based rotation, e.g. metrics.log, .1, .2
+
+    Each record is a double timestamp followed by one 32-bit float per
+    metric (NaN when missing), the same layout as RingHistory. Records are
+    buffered in memory and written in one append once flush_interval
+    seconds have passed, so storage sees one write per interval instead
+    of one per sample. When the live file reaches max_bytes it is renamed
+    to .1 (and older files shifted up); only `files` files are kept.
+    Queries mmap each file and binary search its timestamps, so nothing
+    is read beyond the records in range. While the log can't be written
+    (read-only or full storage), up to max_pending bytes of the newest
+    records are held in memory and retried on every flush.
+    """
+
+    def __init__(self, path, max_bytes=16 * 1024 * 1024, files=4, flush_interval=60,
+                 metrics=METRICS, max_pending=MAX_PENDING_BYTES):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.files = max(1, files)
+        self.flush_interval = flush_interval
+        self.metrics = metrics
+        self.record = struct.Struct(f'<d{len(metrics)}f')
+        self.header = HEADER.pack(MAGIC, LOG_VERSION, len(metrics))
+        self.pending = bytearray()
+        self.max_pending = max_pending
+        self.failing = False
+        self.last_flush = time.monotonic()
+        self.lock = threading.Lock()
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+
+    def paths(self):
+        """Log files from oldest to newest"""
+        return [f"{self.path}.{n}" for n in range(self.files - 1, 0, -1)] + [self.path]
+
+    def append(self, timestamp, stats):
+        """Queue one sample, writing the batch out once flush_interval has passed"""
+        values = [stats.get(metric) for metric in self.metrics]
+        record = self.record.pack(timestamp, *(math.nan if v is None else v for v in values))
+        with self.lock:
+            self.pending += record
+            if time.monotonic() - self.last_flush >= self.flush_interval:
+                self._flush()
+
+    def flush(self):
+        """Write out any queued samples now"""
+        with self.lock:
+            self._flush()
+
+    def _flush(self):
+        self.last_flush = time.monotonic()
+        if not self.pending:
+            return
+        try:
+            self._write()
+        except OSError as e:
+            # Keep the newest records for the next attempt (and /history),
+            # but never more than max_pending bytes of them
+            if not self.failing:
+                print(f"Warning: Could not write metrics log {self.path}, will retry: {e}")
+                self.failing = True
+            excess = len(self.pending) - self.max_pending
+            if excess > 0:
+                del self.pending[:math.ceil(excess / self.record.size) * self.record.size]
+            return
+        if self.failing:
+            print(f"Metrics log {self.path} is writable again")
+            self.failing = False
+
+    def _write(self):
+        """Append the pending records, raising OSError if the file can't be written"""
+        with open(self.path, 'ab', buffering=0) as f:
+            size = f.tell()
+            if size == 0:
+                f.write(self.header)
+            else:
+                # Drop a partial record left by a crash or a failed write
+                whole = HEADER.size + (size - HEADER.size) // self.record.size * self.record.size
+                if whole != size:
+                    f.truncate(whole)
+                    size = whole
+            try:
+                written = 0
+                while written < len(self.pending):
+                    written += f.write(self.pending[written:])
+            except OSError:
+                # The batch is written again later; don't leave part of it
+                with contextlib.suppress(OSError):
+                    f.truncate(size)
+                raise
+            size = f.tell()
+        self.pending.clear()
+        if size >= self.max_bytes:
+            self._rotate()
+
+    def _rotate(self):
+        """Shift metrics.log -> .1 -> .2 ..., dropping the oldest"""
+        paths = self.paths()
+        if os.path.exists(paths[0]):
+            os.remove(paths[0])
+        for older, newer in zip(paths, paths[1:]):
+            if os.path.exists(newer):
+                os.replace(newer, older)
+
+    def _open_files(self):
+        """Open every readable log file, oldest first"""
+        handles = []
+        with self.lock:
+            for path in self.paths():
+                try:
+                    f = open(path, 'rb')
+                except FileNotFoundError:
+                    continue
+                if f.read(HEADER.size) != self.header:
+                    print(f"Skipping {path}: not a log of the current metrics")
+                    f.close()
+                    continue
+                handles.append(f)
+        return handles
+
+    def buckets(self, metric, since, until, step):
+        """Downsample one metric over [since, until) into min/avg/max buckets
+
+        Same result format as RingHistory.buckets(). Samples still waiting
+        to be flushed are scanned from a copy of the in-memory batch.
+        """
+        step = max(step, (until - since) / MAX_BUCKETS)
+        column = self.metrics.index(metric)
+        partials = {}
+        for f in self._open_files():
+            with f:
+                count = (os.fstat(f.fileno()).st_size - HEADER.size) // self.record.size
+                if count <= 0:
+                    continue
+                with mmap.mmap(f.fileno(), HEADER.size + count * self.record.size,
+                               access=mmap.ACCESS_READ) as mapped:
+                    self._scan(mapped, count, column, since, until, step, partials)
+        with self.lock:
+            count = len(self.pending) // self.record.size
+            batch = self.header + bytes(self.pending)
+        if count:
+            self._scan(batch, count, column, since, until, step, partials)
+        result = []
+        for index in sorted(partials):
+            low, high, total, samples = partials[index]
+            result.append({'t': since + index * step, 'min': low, 'max': high,
+                           'avg': total / samples, 'count': samples})
+        return step, result
+
+    def _bisect(self, mapped, count, timestamp):
+        """Index of the first record at or after timestamp"""
+        low, high = 0, count
+        size = self.record.size
+        while low < high:
+            mid = (low + high) // 2
+            if struct.unpack_from('<d', mapped, HEADER.size + mid * size)[0] < timestamp:
+                low = mid + 1
+            else:
+                high = mid
+        return low
+
+    def _scan(self, mapped, count, column, since, until, step, partials):
+        """Fold one buffer's records into partials: bucket -> (min, max, sum, count)
+
+        The buffer is a mapped file or the pending batch behind a header.
+        A bucket's values are read as a strided view of the records,
+        so the reduction runs in builtins without unpacking each record.
+        """
+        stride = self.record.size // 4
+        first = self._bisect(mapped, count, since)
+        last = self._bisect(mapped, count, until)
+        if first >= last:
+            return
+        timestamp = struct.unpack_from('<d', mapped, HEADER.size + first * self.record.size)[0]
+        index = int((timestamp - since) // step)
+        with memoryview(mapped) as view, view[HEADER.size:].cast('f') as floats:
+            while first < last:
+                end = min(self._bisect(mapped, count, since + (index + 1) * step), last)
+                if end > first:
+                    with floats[first * stride + 2 + column:end * stride:stride] as values:
+                        samples = values.tolist()
+                    total = sum(samples)
+                    if math.isnan(total):
+                        samples = [value for value in samples if not math.isnan(value)]
+                        total = sum(samples)
+                    if samples:
+                        partial = partials.get(index)
+                        if partial is None:
+                            partials[index] = (min(samples), max(samples), total, len(samples))
+                        else:
+                            partials[index] = (min(partial[0], min(samples)), max(partial[1], max(samples)),
+                                               partial[2] + total, partial[3] + len(samples))
+                first = end
+                index += 1
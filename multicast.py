@@ -0,0 +1,156 @@
+"""
+UDP multicast transport for node stats
+temp_server.py sends one datagram per sample; temp_monitor.py listens for all nodes
+"""
+
+import socket
+import struct
+import threading
+import time
+import wire
+
+# Datagrams never leave the local network segment
+MULTICAST_TTL = 1
+# A datagram further behind the newest one than this means the sender
+# restarted, even if its clock says otherwise
+REORDER_WINDOW = 64
+
+def open_sender(interface='', ttl=MULTICAST_TTL):
+    """UDP socket for sending to a multicast group from interface (an IPv4 address)"""
+    sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM, socket.IPPROTO_UDP)
+    sock.setsockopt(socket.IPPROTO_IP, socket.IP_MULTICAST_TTL, ttl)
+    # Deliver to listeners on this host too, such as the display node's own monitor
+    sock.setsockopt(socket.IPPROTO_IP, socket.IP_MULTICAST_LOOP, 1)
+    if interface:
+        sock.setsockopt(socket.IPPROTO_IP, socket.IP_MULTICAST_IF, socket.inet_aton(interface))
+    return sock
+
+def open_listener(group, port, interface=''):
+    """UDP socket bound to port and joined to group on interface"""
+    sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM, socket.IPPROTO_UDP)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind(('', port))
+    membership = struct.pack('4s4s', socket.inet_aton(group), socket.inet_aton(interface or '0.0.0.0'))
+    sock.setsockopt(socket.IPPROTO_IP, socket.IP_ADD_MEMBERSHIP, membership)
+    return sock
+
+class MulticastSender:
+    """Send each snapshot as one wire-encoded datagram tagged with the node name
+
+    Datagrams can't negotiate, so version is the schema every listener
+    must decode; keep it at the oldest display's version while upgrading.
+    """
+
+    def __init__(self, group, port, name=None, interface='', version=wire.WIRE_VERSION):
+        self.address = (group, port)
+        self.name = name or socket.gethostname()
+        self.version = version
+        self.sock = open_sender(interface)
+
+    def send(self, stats):
+        """Send one snapshot; errors are reported, never raised"""
+        try:
+            self.sock.sendto(wire.encode_datagram(self.name, stats, self.version), self.address)
+        except OSError as e:
+            print(f"Error sending multicast stats: {e}")
+
+class NodeFeed:
+    """Latest datagram from one sender, with loss, reordering and restart counters"""
+
+    __slots__ = ('name', 'stats', 'seq', 'last_seen', 'received', 'lost', 'reordered', 'restarts')
+
+    def __init__(self, name):
+        self.name = name
+        self.stats = None
+        self.seq = None
+        self.last_seen = None
+        self.received = 0
+        self.lost = 0
+        self.reordered = 0
+        self.restarts = 0
+
+    def counters(self):
+        return {'received': self.received, 'lost': self.lost, 'reordered': self.reordered,
+                'restarts': self.restarts}
+
+class MulticastListener:
+    """Keep the newest snapshot from every node multicasting to the group
+
+    Feeds are keyed by sender address and can also be looked up by the
+    node name carried in each datagram. Sequence numbers count gaps as
+    lost and late datagrams as reordered; late ones never replace newer
+    stats. A sequence number that goes back while the sample timestamp
+    moves forward (or that goes back by more than REORDER_WINDOW) means
+    the sender restarted, and starts its count over. on_update is called
+    after each datagram and after every poll_timeout seconds of silence,
+    so callers can age out silent nodes.
+    """
+
+    def __init__(self, group, port, interface='', on_update=None, poll_timeout=1.0):
+        self.sock = open_listener(group, port, interface)
+        self.sock.settimeout(poll_timeout)
+        self.on_update = on_update
+        self.feeds = {}  # Sender IP -> NodeFeed
+        self.names = {}  # Node name -> sender IP
+
+    def start(self):
+        """Receive datagrams on a background thread"""
+        thread = threading.Thread(target=self.run, name='multicast', daemon=True)
+        thread.start()
+        return thread
+
+    def run(self):
+        while True:
+            try:
+                data, (addr, _) = self.sock.recvfrom(2048)
+            except socket.timeout:
+                pass
+            except OSError as e:
+                print(f"Error receiving multicast stats: {e}")
+                time.sleep(1)
+                continue
+            else:
+                self.handle(data, addr, time.monotonic())
+            if self.on_update is not None:
+                self.on_update()
+
+    def handle(self, data, addr, now):
+        """Record one datagram received from addr at monotonic time now"""
+        try:
+            name, stats = wire.decode_datagram(data)
+        except ValueError as e:
+            print(f"Ignoring multicast datagram from {addr}: {e}")
+            return
+        feed = self.feeds.get(addr)
+        if feed is None:
+            feed = self.feeds[addr] = NodeFeed(name)
+        self.names[name] = addr
+        feed.name = name
+        feed.received += 1
+        seq = stats['seq']
+        if feed.seq is not None and seq <= feed.seq and (
+                seq <= feed.seq - REORDER_WINDOW or stats['timestamp'] > feed.stats['timestamp']):
+            feed.restarts += 1
+            feed.seq = None
+        if feed.seq is not None and seq <= feed.seq:
+            # Arrived after a newer one; it was counted as lost in the gap
+            feed.reordered += 1
+            if seq < feed.seq and feed.lost:
+                feed.lost -= 1
+            return
+        if feed.seq is not None and seq > feed.seq + 1:
+            feed.lost += seq - feed.seq - 1
+        feed.seq = seq
+        feed.stats = stats
+        feed.last_seen = now
+
+    def feed(self, key):
+        """The feed for a node name or sender IP, or None"""
+        return self.feeds.get(self.names.get(key, key))
+
+    def get(self, key, max_age):
+        """Latest stats of a node, or None if it has been silent for max_age seconds"""
+        feed = self.feed(key)
+        if feed is None or feed.last_seen is None or time.monotonic() - feed.last_seen > max_age:
+            return None
+        return feed.stats
@@ -0,0 +1,116 @@
+"""
+Row-based renderer for the OLED screens
+Keeps one persistent canvas and redraws only the text rows that changed
+"""
+
+from collections import OrderedDict
+from PIL import Image, ImageDraw, ImageFont
+
+class RowRenderer:
+    """Draw screens as fixed-height text rows onto a persistent 1-bit canvas
+
+    Fonts are loaded once. Rasterized strings are cached per (text, font)
+    with LRU eviction and pasted into place, and a row is only touched when
+    its text differs from what is already on the canvas.
+    """
+
+    def __init__(self, width, height, row_height=16, cache_size=128):
+        self.width = width
+        self.height = height
+        self.row_height = row_height
+        self.font = ImageFont.load_default()
+        self.image = Image.new("1", (width, height))
+        self.draw = ImageDraw.Draw(self.image)
+        self.rows = [None] * (height // row_height)
+        self.cache_size = cache_size
+        self.bitmaps = OrderedDict()
+
+    def text_bitmap(self, text, font=None):
+        """Return the rasterized bitmap for text, from the LRU cache if possible"""
+        font = font or self.font
+        key = (text, font)
+        bitmap = self.bitmaps.get(key)
+        if bitmap is not None:
+            self.bitmaps.move_to_end(key)
+            return bitmap
+        right, bottom = self.draw.textbbox((0, 0), text, font=font)[2:]
+        bitmap = Image.new("1", (max(1, right), max(1, min(bottom, self.row_height))))
+        ImageDraw.Draw(bitmap).text((0, 0), text, font=font, fill=255)
+        self.bitmaps[key] = bitmap
+        if len(self.bitmaps) > self.cache_size:
+            self.bitmaps.popitem(last=False)
+        return bitmap
+
+    def clear_row(self, index):
+        """Blank one row of the canvas"""
+        y = index * self.row_height
+        self.draw.rectangle((0, y, self.width - 1, y + self.row_height - 1), fill=0)
+
+    def draw_row(self, index, text):
+        """Show text in one row, redrawing only if it changed"""
+        if text == self.rows[index]:
+            return
+        self.clear_row(index)
+        if text:
+            self.image.paste(self.text_bitmap(text), (0, index * self.row_height))
+        self.rows[index] = text
+
+    def draw_graph_row(self, index, label, graphs):
+        """Draw a text label followed by graph bitmaps in one row
+
+        graphs is a list of (x, image) pairs. The label is only redrawn when
+        it changed; the graphs are pasted every time.
+        """
+        key = ('graph', label)
+        if self.rows[index] != key:
+            self.clear_row(index)
+            self.image.paste(self.text_bitmap(label), (0, index * self.row_height))
+            self.rows[index] = key
+        for x, graph in graphs:
+            self.image.paste(graph, (x, index * self.row_height + (self.row_height - graph.height) // 2))
+        return self.image
+
+    def draw_rows(self, rows):
+        """Bring the canvas up to date with a list of row strings
+
+        Rows past the end of the list are blanked. Returns the canvas image.
+        """
+        for index in range(len(self.rows)):
+            self.draw_row(index, rows[index] if index < len(rows) else "")
+        return self.image
+
+    def invalidate(self):
+        """Clear the canvas and forget what every row shows"""
+        self.draw.rectangle((0, 0, self.width - 1, self.height - 1), fill=0)
+        self.rows = [None] * len(self.rows)
+
+class Sparkline:
+    """Scrolling 1-bit line graph updated one column at a time
+
+    The bitmap doubles as the rolling buffer: each push() shifts it left by
+    one column and draws only the newest point, so the cost per sample is
+    fixed no matter how long the window is. Values are plotted on a fixed
+    [low, high] scale; None leaves a gap.
+    """
+
+    def __init__(self, width, height, low, high):
+        self.image = Image.new("1", (width, height))
+        self.draw = ImageDraw.Draw(self.image)
+        self.low = low
+        self.high = high
+        self.last_y = None
+
+    def push(self, value):
+        """Scroll left one column and plot value in the rightmost column"""
+        width, height = self.image.size
+        self.image.paste(self.image.crop((1, 0, width, height)), (0, 0))
+        self.draw.line((width - 1, 0, width - 1, height - 1), fill=0)
+        if value is None:
+            self.last_y = None
+            return
+        fraction = (value - self.low) / (self.high - self.low)
+        y = height - 1 - round(min(max(fraction, 0.0), 1.0) * (height - 1))
+        # Join to the previous point with a vertical run in the new column
+        top, bottom = (y, y) if self.last_y is None else sorted((y, self.last_y))
+        self.draw.line((width - 1, top, width - 1, bottom), fill=255)
+        self.last_y = y
@@ -8,13 +8,22 @@ import time
 import configparser
 import os
 import requests
-import psutil
-from board import SCL, SDA
-import busio
-from PIL import Image, ImageDraw, ImageFont
-import adafruit_ssd1306  # SSD1306/SSD1309 driver for I2C displays
+from requests.adapters import HTTPAdapter
+import socket
+from aggregates import WindowedAggregates, parse_aggregates, parse_duration, window_label
+from alerts import ALERT_FIELDS, AlertState, parse_rules
+from collector import DETAIL_FIELDS, Collector
+from framebuffer import DirtyPageWriter
+from multicast import MulticastListener
+from renderer import RowRenderer, Sparkline
+from timings import Timings
+import wire
 import signal
 import sys
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from concurrent.futures import ThreadPoolExecutor, wait
 
 # Load configuration
 config = configparser.ConfigParser()
@@ -25,90 +34,222 @@ OTHER_NODES = [node.strip() for node in config.get('nodes', 'other_nodes').split
 NODE_PORT = config.getint('nodes', 'port')
 UPDATE_INTERVAL = config.getint('display', 'update_interval')
 SCREEN_ROTATION_INTERVAL = config.getint('display', 'screen_rotation_interval')
+# Seconds between display frames, independent of how often nodes are fetched
+FRAME_INTERVAL = config.getfloat('display', 'frame_interval', fallback=0.25)
+# Overall time budget for fetching all nodes in one refresh cycle (seconds)
+FETCH_DEADLINE = config.getfloat('display', 'fetch_deadline', fallback=2.5)
+# 'poll' requests /stats every update; 'stream' subscribes to /stats/stream;
+# 'multicast' listens for the datagrams nodes send on every sample
+UPDATE_MODE = config.get('display', 'update_mode', fallback='poll')
+MULTICAST_GROUP = config.get('nodes', 'multicast_group', fallback='239.255.42.2')
+MULTICAST_PORT = config.getint('nodes', 'multicast_port', fallback=5002)
+MULTICAST_INTERFACE = config.get('nodes', 'multicast_interface', fallback='')
+# Seconds without a datagram before a node is shown as offline
+MULTICAST_TIMEOUT = config.getfloat('display', 'multicast_timeout', fallback=5)
+# Port for the /cluster aggregation endpoint on the display node (0 = off)
+CLUSTER_PORT = config.getint('display', 'cluster_port', fallback=5001)
+# Seconds between /cluster rebuilds when no new stats arrive, so ages keep counting
+CLUSTER_REFRESH = 1
+STREAM_BACKOFF_MAX = 30
+# Separate connect and read timeouts for node requests (seconds)
+CONNECT_TIMEOUT = config.getfloat('display', 'connect_timeout', fallback=0.5)
+READ_TIMEOUT = config.getfloat('display', 'read_timeout', fallback=2.0)
+# Longest wait between probes of a node that is down (seconds)
+OFFLINE_BACKOFF_MAX = config.getfloat('display', 'offline_backoff_max', fallback=60)
+# Consecutive failed fetches before a node counts as down and is skipped
+OFFLINE_FAILURES = max(1, config.getint('display', 'offline_failures', fallback=3))
+
+# Threshold rules for the local node; remote nodes evaluate their own
+ALERT_RULES = parse_rules(config)
+ALERT_MIN_DURATION = config.getfloat('alerts', 'min_duration', fallback=30)
+# Seconds without fresh stats before a node raises an offline alert (0 = off)
+OFFLINE_ALERT = config.getfloat('alerts', 'offline', fallback=60)
+
+# Rolling aggregates for the local node; remote nodes compute their own
+AGGREGATE_WINDOWS, AGGREGATE_METRICS = parse_aggregates(config)
+# Window shown on the aggregates screen
+AGGREGATE_WINDOW = window_label(parse_duration(config.get('display', 'aggregate_window', fallback='5m')))
+# Seconds between samples of the local node in poll mode, as on the node servers
+LOCAL_SAMPLE_INTERVAL = config.getfloat('nodes', 'stats_interval', fallback=1.0)
+
+# Timing instrumentation, summarized on the console every summary_interval
+TIMINGS_ENABLED = config.getboolean('timings', 'enabled', fallback=True)
+TIMINGS_WINDOW = config.getint('timings', 'window', fallback=512)
+TIMINGS_SUMMARY_INTERVAL = config.getfloat('timings', 'summary_interval', fallback=60)
 
 # I2C display configuration
-I2C_ADDRESS = config.get('display', 'i2c_address', fallback='0x3C')
+# 'auto' tries the cached address first; an explicit address is tried as given
+I2C_ADDRESS = config.get('display', 'i2c_address', fallback='auto')
 DISPLAY_WIDTH = config.getint('display', 'width', fallback=128)
 DISPLAY_HEIGHT = config.getint('display', 'height', fallback=64)
+# Where the address the display was last found at is remembered
+I2C_ADDRESS_CACHE = config.get('display', 'i2c_address_cache',
+                               fallback=os.path.join(os.path.dirname(__file__), '.i2c_address'))
+# How long to keep rescanning a bus where no display answers yet (seconds)
+I2C_SCAN_TIMEOUT = 10
 
-# I2C display setup for OLED (e.g., SSD1306, SSD1309)
-print("Initializing I2C display...")
+# Display and its frame writer, set up by init_display()
+display = None
+frame_writer = None
+# Persistent canvas; only rows whose text changed are redrawn
+renderer = RowRenderer(DISPLAY_WIDTH, DISPLAY_HEIGHT)
+# Rolling durations of fetching, rendering and display transfers
+timings = Timings(TIMINGS_WINDOW, TIMINGS_ENABLED)
 
-# Initialize I2C bus
-i2c = busio.I2C(SCL, SDA)
+def load_cached_address():
+    """Return the last I2C address a display was found at, or None"""
+    try:
+        with open(I2C_ADDRESS_CACHE) as f:
+            return int(f.read().strip(), 16)
+    except (OSError, ValueError):
+        return None
 
-# Initialize display with retry logic
-display = None
-max_retries = 20
-retry_delay = 0.5
+def save_cached_address(addr):
+    """Remember the display's address so the next start tries it first"""
+    try:
+        with open(I2C_ADDRESS_CACHE, 'w') as f:
+            f.write(f"0x{addr:02X}\n")
+    except OSError as e:
+        print(f"Warning: Could not save I2C address to {I2C_ADDRESS_CACHE}: {e}")
 
-print(f"I2C Configuration:")
-print(f"  Address: {I2C_ADDRESS}")
-print(f"  Display: {DISPLAY_WIDTH}x{DISPLAY_HEIGHT}")
+def scan_i2c(i2c):
+    """Return the addresses that ACK on the bus, or None if it can't be scanned"""
+    deadline = time.monotonic() + 1
+    while not i2c.try_lock():
+        if time.monotonic() > deadline:
+            return None
+        time.sleep(0.01)
+    try:
+        return i2c.scan()
+    except Exception as e:
+        print(f"I2C bus scan failed: {e}")
+        return None
+    finally:
+        i2c.unlock()
 
-# Convert hex string to int
-addr = int(I2C_ADDRESS, 16) if isinstance(I2C_ADDRESS, str) else I2C_ADDRESS
+def init_display():
+    """Find the I2C OLED display, clear it and set up the frame writer
 
-# Try common I2C addresses if the configured one fails
-addresses_to_try = [addr]
-if addr not in [0x3C, 0x3D]:
-    addresses_to_try.extend([0x3C, 0x3D])
+    With i2c_address = auto the last address a display was found at is
+    tried first; an explicit i2c_address is tried instead of it. 0x3C and
+    0x3D follow. A bus scan picks the first of those that ACKs, and only
+    that address is retried while the display finishes powering up. If
+    none answers yet, the bus is rescanned with a growing delay for up to
+    I2C_SCAN_TIMEOUT seconds. If the bus can't be scanned, or nothing
+    turns up in time, each candidate gets a single attempt.
+    """
+    global display, frame_writer
+    from board import SCL, SDA
+    import busio
+    import adafruit_ssd1306  # SSD1306/SSD1309 driver for I2C displays
 
-for addr in addresses_to_try:
-    for attempt in range(max_retries):
-        try:
-            print(f"Trying I2C address 0x{addr:02X} (attempt {attempt + 1}/{max_retries})...")
-            display = adafruit_ssd1306.SSD1306_I2C(DISPLAY_WIDTH, DISPLAY_HEIGHT, i2c, addr=addr, reset=None)
-            print(f"✓ Display found at address 0x{addr:02X}")
+    # I2C display setup for OLED (e.g., SSD1306, SSD1309)
+    print("Initializing I2C display...")
+
+    # Initialize I2C bus
+    i2c = busio.I2C(SCL, SDA)
+
+    display = None
+    max_retries = 10
+    retry_delay = 0.1
+
+    print(f"I2C Configuration:")
+    print(f"  Address: {I2C_ADDRESS}")
+    print(f"  Display: {DISPLAY_WIDTH}x{DISPLAY_HEIGHT}")
+
+    # The cache only stands in for an address that isn't configured
+    if I2C_ADDRESS.strip().lower() == 'auto':
+        configured = None
+        cached = load_cached_address()
+    else:
+        configured = int(I2C_ADDRESS, 16)
+        cached = None
+
+    candidates = []
+    for candidate in (cached, configured, 0x3C, 0x3D):
+        if candidate is not None and candidate not in candidates:
+            candidates.append(candidate)
+
+    attempts = [(a, 1) for a in candidates]
+    deadline = time.monotonic() + I2C_SCAN_TIMEOUT
+    scan_delay = 0.25
+    while True:
+        found = scan_i2c(i2c)
+        if found is None:
             break
-        except Exception as e:
-            if attempt < max_retries - 1:
-                print(f"  Retry {attempt + 1}: {e}")
-                time.sleep(retry_delay)
-            else:
-                print(f"  Failed after {max_retries} attempts: {e}")
+        print(f"I2C bus scan: {', '.join(f'0x{a:02X}' for a in found) or 'no devices'}")
+        present = [a for a in candidates if a in found]
+        if present:
+            attempts = [(present[0], max_retries)]
+            break
+        if time.monotonic() + scan_delay > deadline:
+            print("  No display on the bus yet, trying each address once")
+            break
+        print(f"  No display on the bus yet, rescanning in {scan_delay:g}s")
+        time.sleep(scan_delay)
+        scan_delay = min(scan_delay * 2, 2)
+
+    for addr, retries in attempts:
+        for attempt in range(retries):
+            try:
+                print(f"Trying I2C address 0x{addr:02X} (attempt {attempt + 1}/{retries})...")
+                display = adafruit_ssd1306.SSD1306_I2C(DISPLAY_WIDTH, DISPLAY_HEIGHT, i2c, addr=addr, reset=None)
+                print(f"✓ Display found at address 0x{addr:02X}")
+                break
+            except Exception as e:
+                if attempt < retries - 1:
+                    print(f"  Retry {attempt + 1}: {e}")
+                    time.sleep(retry_delay)
+                else:
+                    print(f"  Failed after {retries} attempts: {e}")
     
-    if display is not None:
-        break
-
-if display is None:
-    print("=" * 60)
-    print("ERROR: Could not find I2C OLED display!")
-    print("=" * 60)
-    print("Troubleshooting steps:")
-    print("  1. Check physical connections:")
-    print("     - VCC to 3.3V or 5V")
-    print("     - GND to Ground")
-    print("     - SCL to GPIO3 (Pin 5)")
-    print("     - SDA to GPIO2 (Pin 3)")
-    print()
-    print("  2. Verify I2C is enabled:")
-    print("     sudo raspi-config")
-    print("     -> Interface Options -> I2C -> Enable")
-    print("     -> Reboot")
-    print()
-    print("  3. Check if display appears on I2C bus:")
-    print("     sudo apt-get install -y i2c-tools")
-    print("     sudo i2cdetect -y 1")
-    print()
-    print("  4. Check I2C permissions:")
-    print("     sudo usermod -aG i2c $USER")
-    print("     (then logout and login again)")
-    sys.exit(1)
-
-# Clear display on startup to remove random pixels
-try:
-    display.fill(0)
-    display.show()
-    print("✓ Display initialized and cleared successfully")
-except Exception as e:
-    print(f"Warning: Could not clear display: {e}")
-    print("Continuing anyway...")
+        if display is not None:
+            if addr != cached:
+                save_cached_address(addr)
+            break
+
+    if display is None:
+        print("=" * 60)
+        print("ERROR: Could not find I2C OLED display!")
+        print("=" * 60)
+        print("Troubleshooting steps:")
+        print("  1. Check physical connections:")
+        print("     - VCC to 3.3V or 5V")
+        print("     - GND to Ground")
+        print("     - SCL to GPIO3 (Pin 5)")
+        print("     - SDA to GPIO2 (Pin 3)")
+        print()
+        print("  2. Verify I2C is enabled:")
+        print("     sudo raspi-config")
+        print("     -> Interface Options -> I2C -> Enable")
+        print("     -> Reboot")
+        print()
+        print("  3. Check if display appears on I2C bus:")
+        print("     sudo apt-get install -y i2c-tools")
+        print("     sudo i2cdetect -y 1")
+        print()
+        print("  4. Check I2C permissions:")
+        print("     sudo usermod -aG i2c $USER")
+        print("     (then logout and login again)")
+        sys.exit(1)
+
+    # Clear display on startup to remove random pixels
+    try:
+        display.fill(0)
+        display.show()
+        print("✓ Display initialized and cleared successfully")
+    except Exception as e:
+        print(f"Warning: Could not clear display: {e}")
+        print("Continuing anyway...")
+
+    # Sends only the parts of each frame that changed since the last one
+    frame_writer = DirtyPageWriter(display)
 
 def cleanup_display():
     """Clear and turn off display"""
     display.fill(0)
     display.show()
+    frame_writer.invalidate()
 
 def signal_handler(sig, frame):
     """Handle shutdown gracefully"""
@@ -116,59 +257,221 @@ def signal_handler(sig, frame):
     cleanup_display()
     sys.exit(0)
 
-signal.signal(signal.SIGINT, signal_handler)
-signal.signal(signal.SIGTERM, signal_handler)
+# Keeps /proc and /sys files open between cycles
+local_collector = Collector()
 
-def get_local_stats():
-    """Get stats for the local CM4"""
+# Alerts on the local node, evaluated as the node servers do on their sampler
+local_alerts = AlertState(ALERT_RULES, ALERT_MIN_DURATION)
+local_aggregates = WindowedAggregates(AGGREGATE_WINDOWS, AGGREGATE_METRICS)
+# Latest sample from the local sampler thread, once start_local_sampler() ran
+local_sampling = False
+local_stats = None
+
+def sample_local_stats():
+    """Sample the local CM4 and feed its alerts and aggregates
+
+    CPU usage and network rates cover the time since the previous sample.
+    """
     try:
-        stats = {}
-        
-        # Temperature
-        with open('/sys/class/thermal/thermal_zone0/temp', 'r') as f:
-            stats['temp'] = float(f.read().strip()) / 1000.0
-        
-        # CPU
-        stats['cpu_percent'] = psutil.cpu_percent(interval=0.5)
-        stats['load_avg'] = psutil.getloadavg()[0]
-        
-        # RAM
-        mem = psutil.virtual_memory()
-        stats['ram_percent'] = mem.percent
-        stats['ram_used_mb'] = mem.used / (1024 * 1024)
-        stats['ram_total_mb'] = mem.total / (1024 * 1024)
-        
-        # Network
-        net = psutil.net_io_counters()
-        stats['net_sent_mb'] = net.bytes_sent / (1024 * 1024)
-        stats['net_recv_mb'] = net.bytes_recv / (1024 * 1024)
-        stats['net_send_rate_kbs'] = 0  # Not calculated locally
-        stats['net_recv_rate_kbs'] = 0
-        
-        # Disk
-        disk = psutil.disk_usage('/')
-        stats['disk_percent'] = disk.percent
-        stats['disk_free_gb'] = disk.free / (1024 * 1024 * 1024)
-        
-        # Uptime
-        stats['uptime_hours'] = (time.time() - psutil.boot_time()) / 3600
-        
+        with timings.timer('local'):
+            stats = dict(local_collector.sample())
+        for field in DETAIL_FIELDS:
+            del stats[field]
+        stats['timestamp'] = time.time()
+        now = time.monotonic()
+        stats['alerts'] = local_alerts.update(stats, now)
+        stats['aggregates'] = local_aggregates.update(stats, now)
         return stats
     except Exception as e:
         print(f"Error reading local stats: {e}")
         return None
 
+def get_local_stats():
+    """Get stats for the local CM4: the local sampler's latest, or a new sample"""
+    if local_sampling:
+        return local_stats
+    return sample_local_stats()
+
+def local_sampler_loop():
+    """Sample the local node every LOCAL_SAMPLE_INTERVAL seconds into local_stats"""
+    global local_stats
+    next_sample = time.monotonic()
+    while True:
+        next_sample += LOCAL_SAMPLE_INTERVAL
+        time.sleep(max(0, next_sample - time.monotonic()))
+        if next_sample < time.monotonic():
+            next_sample = time.monotonic()
+        local_stats = sample_local_stats()
+
+def start_local_sampler():
+    """Sample the local node on a background thread
+
+    Its alerts and aggregates then see a sample every stats_interval, like
+    the node servers', rather than one per update_interval.
+    """
+    global local_sampling, local_stats
+    local_stats = sample_local_stats()
+    local_sampling = True
+    threading.Thread(target=local_sampler_loop, name='local-sampler', daemon=True).start()
+
+# Keep-alive HTTP session and resolved address per node, reused across cycles
+node_sessions = {}
+resolved_nodes = {}
+
+def resolve_node(node):
+    """Resolve a node's hostname once and cache the address"""
+    address = resolved_nodes.get(node)
+    if address is None:
+        address = socket.getaddrinfo(node, NODE_PORT, socket.AF_INET, socket.SOCK_STREAM)[0][4][0]
+        resolved_nodes[node] = address
+    return address
+
+def get_node_session(node):
+    """Get the pooled keep-alive session for a node, creating it if needed"""
+    session = node_sessions.get(node)
+    if session is None:
+        session = requests.Session()
+        session.mount('http://', HTTPAdapter(pool_connections=1, pool_maxsize=2))
+        session.headers['Host'] = f"{node}:{NODE_PORT}"
+        node_sessions[node] = session
+    return session
+
+def reset_node_connection(node):
+    """Forget a node's address and connections so the next poll reconnects"""
+    resolved_nodes.pop(node, None)
+    session = node_sessions.pop(node, None)
+    if session is not None:
+        session.close()
+
+# Last stats and ETag received per (node, fields, windows), for conditional requests
+node_etags = {}
+node_cached_stats = {}
+# ?fields= and ?windows= for the next requests, chosen by the render loop;
+# None = all
+requested_fields = None
+requested_windows = None
+
+def fetch_remote_stats(node):
+    """Request stats from a remote CM4 via HTTP, raising on any failure
+
+    Asks for the compact binary encoding of only requested_fields and
+    the aggregates of requested_windows, and sends the last ETag, so an
+    unchanged snapshot costs an empty 304. Accept lists every schema
+    version this display decodes; a node that speaks none of them answers
+    in JSON, which is understood too.
+    """
+    fields = requested_fields
+    windows = requested_windows
+    key = (node, fields, windows)
+    params = {}
+    if fields:
+        params['fields'] = fields
+    if windows is not None:
+        params['windows'] = windows
+    url = f"http://{resolve_node(node)}:{NODE_PORT}/stats"
+    headers = {'Accept': wire.accept_header()}
+    if key in node_etags:
+        headers['If-None-Match'] = node_etags[key]
+    with timings.timer(f"fetch {node}"):
+        response = get_node_session(node).get(url, headers=headers,
+                                              params=params or None,
+                                              timeout=(CONNECT_TIMEOUT, READ_TIMEOUT))
+    if response.status_code == 304 and key in node_cached_stats:
+        return node_cached_stats[key]
+    response.raise_for_status()
+    if response.headers.get('Content-Type', '').startswith(wire.MEDIA_TYPE):
+        stats = wire.decode(response.content)
+    else:
+        stats = response.json()
+    if 'ETag' in response.headers:
+        node_etags[key] = response.headers['ETag']
+        node_cached_stats[key] = stats
+    return stats
+
+def probe_node(node):
+    """Check a node's /health endpoint, raising if it does not answer"""
+    url = f"http://{resolve_node(node)}:{NODE_PORT}/health"
+    response = get_node_session(node).get(url, timeout=(CONNECT_TIMEOUT, READ_TIMEOUT))
+    response.raise_for_status()
+
+# Circuit breaker state per node: consecutive failures, when to probe
+# next (monotonic), when the failures began (Unix time) and the last
+# stats fetched
+node_health = {}
+
+def breaker_open(node):
+    """Whether a node is known to be down and not yet due for a probe"""
+    health = node_health.get(node)
+    return (health is not None and health['failures'] >= OFFLINE_FAILURES
+            and time.monotonic() < health['next_probe'])
+
 def get_remote_stats(node):
-    """Get stats from a remote CM4 via HTTP"""
-    try:
-        url = f"http://{node}:{NODE_PORT}/stats"
-        response = requests.get(url, timeout=2)
-        if response.status_code == 200:
-            return response.json()
+    """Get stats from a remote CM4, skipping it while it is known to be down
+
+    A failed fetch is retried on the next update, showing the last stats
+    as stale meanwhile. After OFFLINE_FAILURES failures in a row the node
+    is only probed again after an exponential backoff (1 s, 2 s, 4 s, ...
+    up to OFFLINE_BACKOFF_MAX), and this returns None at once until then.
+    A probe checks /health first, and a node that answers is re-admitted
+    straight away. A 4xx answer means the node is up but refused the
+    request, so it is reported once and never counts as a failure.
+    """
+    health = node_health.setdefault(node, {'failures': 0, 'next_probe': 0.0, 'offline_since': None,
+                                           'stats': None, 'rejected': False})
+    if breaker_open(node):
         return None
+    try:
+        if health['failures'] >= OFFLINE_FAILURES:
+            probe_node(node)
+        stats = fetch_remote_stats(node)
+    except requests.exceptions.HTTPError as e:
+        if not 400 <= e.response.status_code < 500:
+            return record_failure(node, health, e)
+        if not health['rejected']:
+            print(f"{node} rejected the stats request: {e}")
+            health['rejected'] = True
+        return None if health['stats'] is None else dict(health['stats'], stale=True)
     except Exception as e:
-        print(f"Error reading stats from {node}: {e}")
-        return None
+        return record_failure(node, health, e)
+    if health['failures'] >= OFFLINE_FAILURES:
+        print(f"{node} is back online after {format_duration(time.time() - health['offline_since'])}")
+    health.update(failures=0, offline_since=None, stats=stats, rejected=False)
+    return stats
+
+def record_failure(node, health, e):
+    """Count a failed fetch against a node's breaker and return what to show"""
+    if isinstance(e, (OSError, requests.exceptions.ConnectionError, requests.exceptions.Timeout)):
+        reset_node_connection(node)
+    if not health['failures']:
+        health['offline_since'] = time.time()
+    health['failures'] += 1
+    if health['failures'] < OFFLINE_FAILURES:
+        return None if health['stats'] is None else dict(health['stats'], stale=True)
+    if health['failures'] == OFFLINE_FAILURES:
+        print(f"{node} is offline: {e}")
+        health['stats'] = None
+    backoff = min(OFFLINE_BACKOFF_MAX, 2 ** (health['failures'] - OFFLINE_FAILURES))
+    health['next_probe'] = time.monotonic() + backoff
+    return None
+
+def format_duration(seconds):
+    """Compact duration for the display: 45s, 12m, 3h, 2d"""
+    if seconds < 60:
+        return f"{seconds:.0f}s"
+    if seconds < 3600:
+        return f"{seconds / 60:.0f}m"
+    if seconds < 86400:
+        return f"{seconds / 3600:.0f}h"
+    return f"{seconds / 86400:.0f}d"
+
+def offline_text(index):
+    """'OFFLINE', followed by how long for remote nodes the breaker tracks"""
+    if index == 0 or index - 1 >= len(OTHER_NODES):
+        return "OFFLINE"
+    since = node_health.get(OTHER_NODES[index - 1], {}).get('offline_since')
+    if since is None:
+        return "OFFLINE"
+    return f"OFFLINE {format_duration(time.time() - since)}"
 
 def get_node_name(index):
     """Get display name for a node"""
@@ -180,41 +483,34 @@ def get_node_name(index):
         return node.split('.')[0] if '.' in node else node
     return f"node{index}"
 
+def format_label(node_name, stats):
+    """6-char row label; a trailing '*' marks last-known (stale) stats"""
+    marker = "*" if stats is not None and stats.get('stale') else " "
+    return f"{node_name:5s}{marker}"
+
 def display_screen1(all_stats):
     """Screen 1: CPU Temp, Usage, RAM, Disk"""
-    display.fill(0)
-    image = Image.new("1", (DISPLAY_WIDTH, DISPLAY_HEIGHT))
-    draw = ImageDraw.Draw(image)
-    font = ImageFont.load_default()
-    
-    y = 0
+    rows = []
     for i, (node_key, stats) in enumerate(all_stats.items()):
         node_name = get_node_name(i)
         
         if stats is not None:
-            temp = stats.get('temp', 0)
+            temp = stats.get('temp') or 0
             cpu = stats.get('cpu_percent', 0)
             ram = stats.get('ram_percent', 0)
             disk = stats.get('disk_percent', 0)
             # Format: "node0 45C 25% 42% 68%"
-            text = f"{node_name:6s}{temp:3.0f}C {cpu:2.0f}% {ram:2.0f}% {disk:2.0f}%"
+            text = f"{format_label(node_name, stats)}{temp:3.0f}C {cpu:2.0f}% {ram:2.0f}% {disk:2.0f}%"
         else:
-            text = f"{node_name:6s}OFFLINE"
+            text = f"{node_name:6s}{offline_text(i)}"
         
-        draw.text((0, y), text, font=font, fill=255)
-        y += 16
+        rows.append(text)
     
-    display.image(image)
-    display.show()
+    return renderer.draw_rows(rows)
 
 def display_screen2(all_stats):
     """Screen 2: Network rates, Uptime"""
-    display.fill(0)
-    image = Image.new("1", (DISPLAY_WIDTH, DISPLAY_HEIGHT))
-    draw = ImageDraw.Draw(image)
-    font = ImageFont.load_default()
-    
-    y = 0
+    rows = []
     for i, (node_key, stats) in enumerate(all_stats.items()):
         node_name = get_node_name(i)
         
@@ -241,59 +537,544 @@ def display_screen2(all_stats):
                 uptime_str = f"{uptime:.1f}h"
             
             # Format: "node0 ↑50K ↓200K 2.3d"
-            text = f"{node_name:6s}^{send_str:4s} v{recv_str:4s} {uptime_str:>5s}"
+            text = f"{format_label(node_name, stats)}^{send_str:4s} v{recv_str:4s} {uptime_str:>5s}"
         else:
-            text = f"{node_name:6s}OFFLINE"
+            text = f"{node_name:6s}{offline_text(i)}"
         
-        draw.text((0, y), text, font=font, fill=255)
-        y += 16
+        rows.append(text)
     
-    display.image(image)
-    display.show()
+    return renderer.draw_rows(rows)
+
+# Screen 3 layout: node label, then temperature and CPU sparklines
+SPARKLINE_LABEL_WIDTH = 36
+SPARKLINE_WIDTH = (DISPLAY_WIDTH - SPARKLINE_LABEL_WIDTH - 2) // 2
+SPARKLINE_HEIGHT = 14
+SPARKLINE_TEMP_RANGE = (30, 90)
+SPARKLINE_CPU_RANGE = (0, 100)
+# Seconds per sparkline column, the same for every node and update mode
+SPARKLINE_INTERVAL = UPDATE_INTERVAL
+
+# node_key -> (temp Sparkline, cpu Sparkline)
+sparklines = {}
+
+def update_sparklines(all_stats):
+    """Plot one column per node: its latest stats, or a gap if offline or stale
+
+    Called every SPARKLINE_INTERVAL, not on each update, so every node's
+    graph scrolls at the same rate however often its stats arrive.
+    """
+    for node_key, stats in all_stats.items():
+        if node_key not in sparklines:
+            sparklines[node_key] = (
+                Sparkline(SPARKLINE_WIDTH, SPARKLINE_HEIGHT, *SPARKLINE_TEMP_RANGE),
+                Sparkline(SPARKLINE_WIDTH, SPARKLINE_HEIGHT, *SPARKLINE_CPU_RANGE),
+            )
+        temp_line, cpu_line = sparklines[node_key]
+        if stats is None or stats.get('stale'):
+            temp_line.push(None)
+            cpu_line.push(None)
+            continue
+        temp_line.push(stats.get('temp'))
+        cpu_line.push(stats.get('cpu_percent'))
+
+def display_screen3(all_stats):
+    """Screen 3: Temperature and CPU sparklines"""
+    cpu_x = DISPLAY_WIDTH - SPARKLINE_WIDTH
+    for i, node_key in enumerate(list(all_stats)[:len(renderer.rows)]):
+        temp_line, cpu_line = sparklines[node_key]
+        renderer.draw_graph_row(i, get_node_name(i), [(SPARKLINE_LABEL_WIDTH, temp_line.image),
+                                                      (cpu_x, cpu_line.image)])
+    for i in range(len(all_stats), len(renderer.rows)):
+        renderer.draw_row(i, "")
+    return renderer.image
+
+def window_aggregates(stats, field):
+    """A node's AGGREGATE_WINDOW aggregates of one stat, or None"""
+    return (stats.get('aggregates') or {}).get(AGGREGATE_WINDOW, {}).get(field)
+
+def display_screen4(all_stats):
+    """Screen 4: CPU average and p95, and peak temperature, over AGGREGATE_WINDOW"""
+    rows = []
+    for i, (node_key, stats) in enumerate(all_stats.items()):
+        node_name = get_node_name(i)
+        
+        if stats is not None:
+            cpu = window_aggregates(stats, 'cpu_percent')
+            temp = window_aggregates(stats, 'temp')
+            if cpu is not None:
+                temp_max = f"{temp['max']:3.0f}C" if temp is not None else "  ?C"
+                # Format: "node0  23%  87% 61C" (a short spike raises p95, not the average)
+                text = f"{format_label(node_name, stats)}{cpu['avg']:3.0f}%{cpu['p95']:4.0f}%{temp_max:>5s}"
+            else:
+                text = f"{format_label(node_name, stats)}no {AGGREGATE_WINDOW} stats"
+        else:
+            text = f"{node_name:6s}{offline_text(i)}"
+        
+        rows.append(text)
+    
+    return renderer.draw_rows(rows)
+
+# How each threshold alert is shown: label and value format
+ALERT_FORMATS = {
+    'temp': ("TEMP", "{:.0f}C"),
+    'cpu': ("CPU", "{:.0f}%"),
+    'ram': ("RAM", "{:.0f}%"),
+    'disk': ("DISK", "{:.0f}%"),
+}
+
+# (node index, alert name) pairs raised anywhere in the cluster
+current_alerts = []
+# Monotonic time each node was first seen without fresh stats
+node_down_since = {}
+
+def update_alerts(all_stats):
+    """Gather the cluster's active alerts into current_alerts
+
+    Threshold alerts arrive in each node's 'alerts' field, so they cost no
+    extra requests. The offline alert is raised here, once a node has had
+    no fresh stats for OFFLINE_ALERT seconds. Returns whether any alert
+    was raised since the last call.
+    """
+    global current_alerts
+    now = time.monotonic()
+    alerts = []
+    for i, (node_key, stats) in enumerate(all_stats.items()):
+        if stats is None or stats.get('stale'):
+            since = node_down_since.setdefault(node_key, now)
+            if OFFLINE_ALERT and now - since >= OFFLINE_ALERT:
+                alerts.append((i, 'offline'))
+        else:
+            node_down_since.pop(node_key, None)
+        if stats is not None:
+            alerts.extend((i, name) for name in stats.get('alerts') or ())
+    raised = not set(alerts) <= set(current_alerts)
+    current_alerts = alerts
+    return raised
+
+def alert_text(i, name, all_stats):
+    """One alert as a display row, e.g. 'node2 TEMP 86C'"""
+    node_key = list(all_stats)[i]
+    stats = all_stats[node_key]
+    node_name = get_node_name(i)
+    if name == 'offline':
+        return f"{node_name:6s}OFFLINE {format_duration(time.monotonic() - node_down_since[node_key])}"
+    label, value_format = ALERT_FORMATS[name]
+    value = stats.get(ALERT_FIELDS[name])
+    return f"{format_label(node_name, stats)}{label} {value_format.format(value) if value is not None else '?'}"
+
+def display_alert_screen(all_stats):
+    """Alert screen: one row per active alert, in the rotation while any is active"""
+    rows = [alert_text(i, name, all_stats) for i, name in current_alerts]
+    if len(rows) > len(renderer.rows):
+        hidden = len(rows) - len(renderer.rows) + 1
+        rows[len(renderer.rows) - 1:] = [f"+{hidden} more alerts"]
+    return renderer.draw_rows(rows)
+
+# Worker pool shared by all refresh cycles; one slot per node
+fetch_pool = ThreadPoolExecutor(max_workers=len(OTHER_NODES) + 1, thread_name_prefix='fetch')
+pending_fetches = {}
+last_known_stats = {}
+
+def fetch_all_stats():
+    """Fetch stats from every node concurrently, bounded by FETCH_DEADLINE
+
+    Nodes that miss the deadline keep their last-known stats, marked with
+    'stale': True. A node whose previous fetch is still outstanding is not
+    queried again until that fetch finishes.
+    """
+    fetchers = {"Node0": (get_local_stats,)}
+    for i, node in enumerate(OTHER_NODES, start=1):
+        fetchers[f"Node{i}"] = (get_remote_stats, node)
+
+    for node_key, (func, *args) in fetchers.items():
+        if node_key not in pending_fetches:
+            pending_fetches[node_key] = fetch_pool.submit(func, *args)
+
+    wait(pending_fetches.values(), timeout=FETCH_DEADLINE)
+
+    all_stats = {}
+    for node_key in fetchers:
+        future = pending_fetches[node_key]
+        if future.done():
+            del pending_fetches[node_key]
+            stats = future.result()
+            last_known_stats[node_key] = stats
+            all_stats[node_key] = stats
+        elif last_known_stats.get(node_key) is not None:
+            all_stats[node_key] = dict(last_known_stats[node_key], stale=True)
+        else:
+            all_stats[node_key] = None
+    return all_stats
+
+# Latest merged stats from the fetchers, read by the render loop. The
+# version increases whenever a fetcher has something new to show.
+latest_stats = {}
+stats_version = 0
+stats_lock = threading.Lock()
+
+def store_stats(all_stats=None):
+    """Publish new stats to the render loop; None only bumps the version"""
+    global latest_stats, stats_version
+    with stats_lock:
+        if all_stats is not None:
+            latest_stats = all_stats
+        stats_version += 1
+
+def poll_loop():
+    """Fetch every node on a fixed UPDATE_INTERVAL cadence, forever"""
+    next_fetch = time.monotonic()
+    while True:
+        try:
+            with timings.timer('fetch cycle'):
+                all_stats = fetch_all_stats()
+            store_stats(all_stats)
+        except Exception as e:
+            print(f"Error fetching stats: {e}")
+        next_fetch += UPDATE_INTERVAL
+        delay = next_fetch - time.monotonic()
+        if delay > 0:
+            time.sleep(delay)
+        else:
+            # Fell behind (slow nodes); restart the schedule from now
+            next_fetch = time.monotonic()
+
+def start_polling():
+    """Poll the nodes from a background thread"""
+    start_local_sampler()
+    threading.Thread(target=poll_loop, name='poll', daemon=True).start()
+
+# Latest stats pushed by each node's stream: node_key -> (stats, connected)
+streamed_stats = {}
+
+def read_events(response):
+    """Yield (event_id, data) pairs from a Server-Sent Events response"""
+    event_id, data = None, []
+    for line in response.iter_lines(decode_unicode=True):
+        if line == '':
+            if data:
+                yield event_id, '\n'.join(data)
+            event_id, data = None, []
+        elif not line.startswith(':'):
+            field, _, value = line.partition(':')
+            value = value[1:] if value.startswith(' ') else value
+            if field == 'id':
+                event_id = value
+            elif field == 'data':
+                data.append(value)
+
+def stream_node(node_key, node):
+    """Keep a /stats/stream subscription to one node open forever
+
+    Reconnects with exponential backoff and resumes from the last sequence
+    number received. While disconnected the last stats stay on screen,
+    marked stale.
+    """
+    session = requests.Session()
+    session.headers['Accept'] = 'text/event-stream'
+    last_seq = None
+    backoff = 1
+    while True:
+        try:
+            headers = {'Last-Event-ID': last_seq} if last_seq else {}
+            url = f"http://{node}:{NODE_PORT}/stats/stream"
+            with session.get(url, headers=headers, stream=True, timeout=(2, 30)) as response:
+                response.raise_for_status()
+                for event_id, data in read_events(response):
+                    last_seq = event_id or last_seq
+                    streamed_stats[node_key] = (json.loads(data), True)
+                    store_stats()
+                    backoff = 1
+        except Exception as e:
+            print(f"Stream from {node} lost: {e}")
+        if node_key in streamed_stats:
+            streamed_stats[node_key] = (streamed_stats[node_key][0], False)
+            store_stats()
+        time.sleep(backoff)
+        backoff = min(backoff * 2, STREAM_BACKOFF_MAX)
+
+def start_streams():
+    """Subscribe to every node, including the local stats server"""
+    nodes = {"Node0": "localhost"}
+    for i, node in enumerate(OTHER_NODES, start=1):
+        nodes[f"Node{i}"] = node
+    for node_key, node in nodes.items():
+        threading.Thread(target=stream_node, args=(node_key, node),
+                         name=f"stream-{node}", daemon=True).start()
+    return list(nodes)
+
+def get_streamed_stats(node_keys):
+    """Current stats from the streams; disconnected nodes are marked stale"""
+    all_stats = {}
+    for node_key in node_keys:
+        stats, connected = streamed_stats.get(node_key, (None, False))
+        if stats is not None and not connected:
+            stats = dict(stats, stale=True)
+        all_stats[node_key] = stats
+    return all_stats
+
+# Listener for update_mode = multicast, and the node name of each node key
+multicast_listener = None
+multicast_nodes = {}
+
+def start_multicast():
+    """Listen for every node's datagrams, including the local stats server's"""
+    global multicast_listener
+    multicast_nodes["Node0"] = socket.gethostname()
+    for i, node in enumerate(OTHER_NODES, start=1):
+        multicast_nodes[f"Node{i}"] = node
+    multicast_listener = MulticastListener(MULTICAST_GROUP, MULTICAST_PORT, MULTICAST_INTERFACE,
+                                           on_update=store_stats)
+    multicast_listener.start()
+
+def get_multicast_stats():
+    """Latest datagram stats per node; nodes silent for MULTICAST_TIMEOUT are None"""
+    all_stats = {}
+    for node_key, node in multicast_nodes.items():
+        stats = multicast_listener.get(node, MULTICAST_TIMEOUT)
+        if stats is None and '.' in node:
+            # Datagrams carry the short hostname; match node1.local to node1
+            stats = multicast_listener.get(node.split('.')[0], MULTICAST_TIMEOUT)
+        all_stats[node_key] = stats
+    return all_stats
+
+# Pre-encoded /cluster response, rebuilt on every update and at least
+# every CLUSTER_REFRESH seconds
+cluster_body = b'{"nodes": {}}'
+# What a complete /stats answer carries; per-core, per-interface and
+# per-zone details are only sent on request
+CLUSTER_FIELDS = tuple(field for field in Collector.FIELDS if field not in DETAIL_FIELDS) + ('sampled_at',)
+
+def publish_cluster(all_stats):
+    """Encode the merged per-node stats served at /cluster
+
+    Remote nodes are asked only for what the display shows, and binary
+    answers and datagrams carry fewer fields than JSON, so each node lists
+    the CLUSTER_FIELDS missing from its entry under 'omitted'.
+    """
+    global cluster_body
+    now = time.time()
+    nodes = {}
+    for i, (node_key, stats) in enumerate(all_stats.items()):
+        sample_time = stats.get('timestamp') if stats is not None else None
+        omitted = [field for field in CLUSTER_FIELDS if field not in stats] if stats is not None else []
+        nodes[get_node_name(i)] = {
+            'online': stats is not None,
+            'stale': bool(stats and stats.get('stale')),
+            'age': now - sample_time if sample_time else None,
+            'omitted': omitted,
+            'stats': stats,
+        }
+        if multicast_listener is not None:
+            # Datagrams received, lost and reordered, and sender restarts
+            feed = multicast_listener.feed(multicast_nodes[node_key])
+            nodes[get_node_name(i)]['multicast'] = feed.counters() if feed else None
+    cluster_body = json.dumps({'timestamp': now, 'nodes': nodes}).encode()
+
+class ClusterHandler(BaseHTTPRequestHandler):
+    """Serve the cached cluster snapshot; never touches the compute nodes"""
+
+    protocol_version = 'HTTP/1.1'
+    # Headers and body are written separately; don't let Nagle delay the body
+    disable_nagle_algorithm = True
+
+    def do_GET(self):
+        if self.path.split('?')[0] != '/cluster':
+            self.send_error(404)
+            return
+        body = cluster_body
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+def start_cluster_server():
+    """Serve /cluster from a background thread"""
+    server = ThreadingHTTPServer(('0.0.0.0', CLUSTER_PORT), ClusterHandler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name='cluster', daemon=True).start()
+    print(f"Serving /cluster on port {CLUSTER_PORT}")
+    return server
+
+# Screens in rotation order; each draws onto the canvas and returns it
+SCREENS = {
+    1: display_screen1,
+    2: display_screen2,
+    3: display_screen3,
+    4: display_screen4,
+}
+# Leads the rotation while any alert is active, and is shown at once for
+# one rotation interval when a new alert is raised
+ALERT_SCREEN = 0
+
+# Stats each screen shows. Temperature and CPU feed the sparklines on
+# every update, so they are always requested.
+SCREEN_FIELDS = {
+    1: ('temp', 'cpu_percent', 'ram_percent', 'disk_percent'),
+    2: ('net_send_rate_kbs', 'net_recv_rate_kbs', 'uptime_hours'),
+    3: (),
+    4: ('temp', 'cpu_percent'),
+}
+ALWAYS_FIELDS = ('temp', 'cpu_percent')
+# Aggregate windows each screen shows; other screens request none
+SCREEN_WINDOWS = {
+    4: AGGREGATE_WINDOW,
+}
+
+def rotation_order():
+    """Screens in rotation, the alert screen first while any alert is active"""
+    return (ALERT_SCREEN, *SCREENS) if current_alerts else tuple(SCREENS)
+
+def fields_for(screens):
+    """?fields= value covering the given screens and the active alerts"""
+    fields = set(ALWAYS_FIELDS)
+    for screen in screens:
+        fields.update(SCREEN_FIELDS.get(screen, ()))
+    fields.update(ALERT_FIELDS[name] for _, name in current_alerts if name in ALERT_FIELDS)
+    return ','.join(sorted(fields))
+
+def windows_for(screens):
+    """?windows= value covering the given screens, empty for none"""
+    return ','.join(sorted({SCREEN_WINDOWS[screen] for screen in screens if screen in SCREEN_WINDOWS}))
+
+def render_screen(screen, all_stats):
+    """Draw one screen and send the changes to the display"""
+    with timings.timer('render'):
+        draw = display_alert_screen if screen == ALERT_SCREEN else SCREENS[screen]
+        image = draw(all_stats)
+    with timings.timer('show'):
+        frame_writer.show(image)
+
+# Console format of each stat
+PRINT_FORMATS = (
+    ('temp', "Temp={:.1f}°C"),
+    ('cpu_percent', "CPU={:.0f}%"),
+    ('ram_percent', "RAM={:.0f}%"),
+    ('disk_percent', "Disk={:.0f}%"),
+    ('net_send_rate_kbs', "Net=↑{:.0f}KB/s"),
+    ('net_recv_rate_kbs', "↓{:.0f}KB/s"),
+    ('uptime_hours', "Uptime={:.1f}h"),
+)
+
+def print_stats(screen, all_stats):
+    """Print the stats of every node to the console"""
+    print(f"\n--- {'Alerts' if screen == ALERT_SCREEN else f'Screen {screen}'} ---")
+    for i, name in current_alerts:
+        print(f"ALERT {alert_text(i, name, all_stats)}")
+    for i, (node_key, stats) in enumerate(all_stats.items()):
+        node_name = get_node_name(i)
+        if stats is not None:
+            # Only the fields the node sent; see SCREEN_FIELDS
+            parts = [text.format(stats[field]) for field, text in PRINT_FORMATS
+                     if stats.get(field) is not None]
+            cpu = window_aggregates(stats, 'cpu_percent')
+            if cpu is not None:
+                parts.append(f"CPU{AGGREGATE_WINDOW}(min/avg/p95/max)="
+                             f"{cpu['min']:.0f}/{cpu['avg']:.0f}/{cpu['p95']:.0f}/{cpu['max']:.0f}%")
+            print(f"{node_name}: {' '.join(parts)}{' (stale)' if stats.get('stale') else ''}")
+        else:
+            print(f"{node_name}: {offline_text(i)}")
 
 def main():
+    """Render at FRAME_INTERVAL from whatever the fetchers last stored
+
+    Fetching runs on its own threads, so screen rotation follows
+    SCREEN_ROTATION_INTERVAL exactly and a slow node never holds up a frame.
+    """
+    global requested_fields, requested_windows
     print("Starting system monitor...")
-    current_screen = 1
-    last_screen_switch = time.time()
+    if UPDATE_MODE == 'stream':
+        print("Subscribing to node stat streams...")
+        node_keys = start_streams()
+        read_stats = lambda: get_streamed_stats(node_keys)
+    elif UPDATE_MODE == 'multicast':
+        print(f"Listening for node stats on {MULTICAST_GROUP}:{MULTICAST_PORT}...")
+        start_multicast()
+        read_stats = get_multicast_stats
+    else:
+        start_polling()
+        read_stats = lambda: latest_stats
+    if CLUSTER_PORT:
+        start_cluster_server()
     
+    started = time.monotonic()
+    next_frame = started
+    drawn_version = 0
+    drawn_screen = None
+    all_stats = None
+    next_summary = started + TIMINGS_SUMMARY_INTERVAL
+    next_plot = started
+    next_cluster = started
+    alert_until = started
     try:
         while True:
-            all_stats = {}
+            # Pick up new data once per fetch, not once per frame
+            with stats_lock:
+                version = stats_version
+            updated = version != drawn_version
+            if updated:
+                drawn_version = version
+                all_stats = read_stats()
+            if all_stats is not None and (updated or time.monotonic() >= next_cluster):
+                publish_cluster(all_stats)
+                next_cluster = time.monotonic() + CLUSTER_REFRESH
+            if all_stats is not None and time.monotonic() >= next_plot:
+                update_sparklines(all_stats)
+                next_plot += SPARKLINE_INTERVAL
+                if next_plot < time.monotonic():
+                    next_plot = time.monotonic() + SPARKLINE_INTERVAL
             
-            # Get local stats
-            all_stats["Node0"] = get_local_stats()
-            
-            # Get remote stats
-            for i, node in enumerate(OTHER_NODES, start=1):
-                all_stats[f"Node{i}"] = get_remote_stats(node)
+            if all_stats is not None:
+                # The rotation is derived from the clock so it never
+                # drifts. A new alert interrupts it for one interval.
+                if update_alerts(all_stats):
+                    alert_until = time.monotonic() + SCREEN_ROTATION_INTERVAL
+                order = rotation_order()
+                rotation = int((time.monotonic() - started) // SCREEN_ROTATION_INTERVAL)
+                if current_alerts and time.monotonic() < alert_until:
+                    screen = ALERT_SCREEN
+                else:
+                    screen = order[rotation % len(order)]
+                # Fetch what this rotation screen and the next one show, so
+                # a screen has its stats the moment it comes up
+                upcoming = (order[rotation % len(order)], order[(rotation + 1) % len(order)])
+                requested_fields = fields_for(upcoming)
+                requested_windows = windows_for(upcoming)
+                render_screen(screen, all_stats)
+                if updated or screen != drawn_screen:
+                    print_stats(screen, all_stats)
+                    drawn_screen = screen
             
-            # Check if it's time to switch screens
-            current_time = time.time()
-            if current_time - last_screen_switch >= SCREEN_ROTATION_INTERVAL:
-                current_screen = 2 if current_screen == 1 else 1
-                last_screen_switch = current_time
+            if timings.enabled and TIMINGS_SUMMARY_INTERVAL > 0 and time.monotonic() >= next_summary:
+                print(timings.summary_line())
+                next_summary += TIMINGS_SUMMARY_INTERVAL
             
-            # Display the current screen
-            if current_screen == 1:
-                display_screen1(all_stats)
+            next_frame += FRAME_INTERVAL
+            delay = next_frame - time.monotonic()
+            if delay > 0:
+                time.sleep(delay)
             else:
-                display_screen2(all_stats)
-            
-            # Print to console
-            print(f"\n--- Screen {current_screen} ---")
-            for i, (node_key, stats) in enumerate(all_stats.items()):
-                node_name = get_node_name(i)
-                if stats is not None:
-                    print(f"{node_name}: Temp={stats.get('temp', 0):.1f}°C CPU={stats.get('cpu_percent', 0):.0f}% "
-                          f"RAM={stats.get('ram_percent', 0):.0f}% Disk={stats.get('disk_percent', 0):.0f}% "
-                          f"Net=↑{stats.get('net_send_rate_kbs', 0):.0f}KB/s ↓{stats.get('net_recv_rate_kbs', 0):.0f}KB/s "
-                          f"Uptime={stats.get('uptime_hours', 0):.1f}h")
-                else:
-                    print(f"{node_name}: OFFLINE")
-            
-            time.sleep(UPDATE_INTERVAL)
+                next_frame = time.monotonic()
     finally:
+        fetch_pool.shutdown(wait=False, cancel_futures=True)
+        for node in list(node_sessions):
+            reset_node_connection(node)
         cleanup_display()
 
+def check_config():
+    """Exit with an error if config.ini asks for something that can't be shown"""
+    labels = [window_label(seconds) for seconds in AGGREGATE_WINDOWS]
+    if AGGREGATE_METRICS and AGGREGATE_WINDOW not in labels:
+        print(f"ERROR: [display] aggregate_window = {AGGREGATE_WINDOW} is not one of "
+              f"the [aggregates] windows: {', '.join(labels) or 'none'}")
+        sys.exit(1)
+
 if __name__ == "__main__":
+    check_config()
+    init_display()
+    signal.signal(signal.SIGINT, signal_handler)
+    signal.signal(signal.SIGTERM, signal_handler)
     main()
@@ -4,11 +4,27 @@ System stats HTTP server for CM4 nodes
 Exposes temperature, CPU, RAM, and network stats
 """
 
-from flask import Flask, jsonify
-import psutil
+from flask import Flask, Response, g, jsonify, request
 import configparser
+import atexit
+import json
+import math
 import os
+import signal
+import sys
+import threading
 import time
+import uuid
+from types import MappingProxyType
+from aggregates import WindowedAggregates, parse_aggregates, window_label
+from alerts import AlertState, parse_rules
+from async_http import AsyncHTTPServer, json_response
+from collector import DETAIL_FIELDS, Collector
+from history import MAX_BUCKETS, METRICS, RingHistory
+from metrics_log import MetricsLog
+from multicast import MulticastSender
+from timings import Timings
+import wire
 
 app = Flask(__name__)
 
@@ -18,103 +34,522 @@ config_path = os.path.join(os.path.dirname(__file__), 'config.ini')
 config.read(config_path)
 
 STATS_INTERVAL = config.getfloat('nodes', 'stats_interval', fallback=1.0)
+# Seconds between samples of each collector group; slow-moving stats are
+# sampled less often and keep their last value in between
+SAMPLE_PERIODS = {
+    'temp': config.getfloat('nodes', 'temp_interval', fallback=STATS_INTERVAL),
+    'cpu': config.getfloat('nodes', 'cpu_interval', fallback=STATS_INTERVAL),
+    'network': config.getfloat('nodes', 'network_interval', fallback=STATS_INTERVAL),
+    'memory': config.getfloat('nodes', 'memory_interval', fallback=max(STATS_INTERVAL, 5)),
+    'disk': config.getfloat('nodes', 'disk_interval', fallback=max(STATS_INTERVAL, 60)),
+    'uptime': config.getfloat('nodes', 'uptime_interval', fallback=max(STATS_INTERVAL, 60)),
+}
+# Shortest period, so the most often a snapshot is published
+SAMPLE_TICK = min(SAMPLE_PERIODS.values())
+# Groups falling due this close together are sampled in one snapshot
+SCHEDULE_SLACK = 0.05
+NODE_PORT = config.getint('nodes', 'port', fallback=5000)
+SERVER_THREADS = config.getint('nodes', 'server_threads', fallback=8)
+# 'waitress' serves every route from a thread pool; 'asyncio' serves
+# /stats, /temp and /health from one event loop
+SERVER = config.get('nodes', 'server', fallback='waitress')
+# Seconds between keep-alive comments on idle /stats/stream connections
+STREAM_KEEPALIVE = 15
+# Each open stream holds a worker thread for as long as it is connected, so
+# at least one worker is always left for /stats and /health
+MAX_STREAMS = max(0, min(config.getint('nodes', 'max_streams', fallback=SERVER_THREADS // 2),
+                         SERVER_THREADS - 1))
+# How far back /history reaches; memory is fixed at 36 bytes per sample
+HISTORY_SECONDS = config.getint('nodes', 'history_seconds', fallback=86400)
+# Optional on-disk log of every sample that survives restarts (empty = off)
+METRICS_LOG = config.get('nodes', 'metrics_log', fallback='')
+METRICS_LOG_MAX_MB = config.getfloat('nodes', 'metrics_log_max_mb', fallback=16)
+METRICS_LOG_FILES = config.getint('nodes', 'metrics_log_files', fallback=4)
+METRICS_LOG_FLUSH = config.getfloat('nodes', 'metrics_log_flush', fallback=60)
+# Also send every sample as one UDP datagram to a multicast group
+MULTICAST = config.getboolean('nodes', 'multicast', fallback=False)
+MULTICAST_GROUP = config.get('nodes', 'multicast_group', fallback='239.255.42.2')
+MULTICAST_PORT = config.getint('nodes', 'multicast_port', fallback=5002)
+MULTICAST_INTERFACE = config.get('nodes', 'multicast_interface', fallback='')
+# Wire schema version of the datagrams; lower it until every display is upgraded
+MULTICAST_VERSION = config.getint('nodes', 'multicast_version', fallback=wire.WIRE_VERSION)
 
-# Store network stats for calculating rates
-last_net_stats = {'bytes_sent': 0, 'bytes_recv': 0, 'timestamp': time.time()}
-net_rates = {'send_rate': 0, 'recv_rate': 0}
-
-def update_network_rates():
-    """Update network transfer rates"""
-    global last_net_stats, net_rates
-    
-    net = psutil.net_io_counters()
-    current_time = time.time()
-    time_delta = current_time - last_net_stats['timestamp']
-    
-    if time_delta > 0:
-        bytes_sent_delta = net.bytes_sent - last_net_stats['bytes_sent']
-        bytes_recv_delta = net.bytes_recv - last_net_stats['bytes_recv']
-        
-        # Calculate rates in KB/s
-        net_rates['send_rate'] = (bytes_sent_delta / time_delta) / 1024
-        net_rates['recv_rate'] = (bytes_recv_delta / time_delta) / 1024
-    
-    last_net_stats = {
-        'bytes_sent': net.bytes_sent,
-        'bytes_recv': net.bytes_recv,
-        'timestamp': current_time
-    }
-
-def get_temp():
-    """Get the CPU temperature"""
+# Rolling per-phase durations served at /debug/timings
+TIMINGS_ENABLED = config.getboolean('timings', 'enabled', fallback=True)
+TIMINGS_WINDOW = config.getint('timings', 'window', fallback=512)
+
+# Threshold rules checked against every sample; see [alerts] in config.ini
+ALERT_RULES = parse_rules(config)
+ALERT_MIN_DURATION = config.getfloat('alerts', 'min_duration', fallback=30)
+
+# Rolling min/avg/max/p95 windows (seconds) and the stats they cover
+AGGREGATE_WINDOWS, AGGREGATE_METRICS = parse_aggregates(config)
+
+history = RingHistory(max(1, int(HISTORY_SECONDS / SAMPLE_TICK)))
+timings = Timings(TIMINGS_WINDOW, TIMINGS_ENABLED)
+metrics_log = None
+if METRICS_LOG:
     try:
-        with open('/sys/class/thermal/thermal_zone0/temp', 'r') as f:
-            temp = float(f.read().strip()) / 1000.0
-        return temp
-    except Exception as e:
-        print(f"Error reading temperature: {e}")
-        return None
+        metrics_log = MetricsLog(METRICS_LOG, int(METRICS_LOG_MAX_MB * 1024 * 1024),
+                                 METRICS_LOG_FILES, METRICS_LOG_FLUSH)
+    except OSError as e:
+        # Serve stats without the log rather than not at all
+        print(f"Warning: Metrics log disabled, cannot use {METRICS_LOG}: {e}")
+multicast_sender = None
+if MULTICAST:
+    multicast_sender = MulticastSender(MULTICAST_GROUP, MULTICAST_PORT, interface=MULTICAST_INTERFACE,
+                                       version=MULTICAST_VERSION)
 
-def get_stats():
-    """Get all system stats"""
-    stats = {}
-    
-    # Update network rates
-    update_network_rates()
-    
-    # Temperature
-    stats['temp'] = get_temp()
-    
-    # CPU load
-    stats['cpu_percent'] = psutil.cpu_percent(interval=STATS_INTERVAL)
-    stats['load_avg'] = psutil.getloadavg()[0]
-    
-    # RAM usage
-    mem = psutil.virtual_memory()
-    stats['ram_percent'] = mem.percent
-    stats['ram_used_mb'] = mem.used / (1024 * 1024)
-    stats['ram_total_mb'] = mem.total / (1024 * 1024)
-    
-    # Network - total and rates
-    net = psutil.net_io_counters()
-    stats['net_sent_mb'] = net.bytes_sent / (1024 * 1024)
-    stats['net_recv_mb'] = net.bytes_recv / (1024 * 1024)
-    stats['net_send_rate_kbs'] = net_rates['send_rate']
-    stats['net_recv_rate_kbs'] = net_rates['recv_rate']
-    
-    # Disk usage
-    disk = psutil.disk_usage('/')
-    stats['disk_percent'] = disk.percent
-    stats['disk_free_gb'] = disk.free / (1024 * 1024 * 1024)
-    
-    # Uptime
-    stats['uptime_hours'] = (time.time() - psutil.boot_time()) / 3600
-    
+# Latest sampler snapshot. Replaced wholesale on every tick and never mutated
+# after publishing, so request handlers can read it without locking.
+# Each snapshot gets the next sequence number; streams wait on the condition.
+latest_snapshot = None
+snapshot_seq = 0
+snapshot_changed = threading.Condition()
+# Sequence numbers restart with the process, so ETags also name the process
+BOOT_ID = uuid.uuid4().hex[:8]
+# One slot per open /stats/stream response
+stream_slots = threading.BoundedSemaphore(MAX_STREAMS) if MAX_STREAMS else None
+
+# Keeps /proc and /sys files open between samples
+collector = Collector()
+# Alerts raised so far; updated by the sampler only
+alert_state = AlertState(ALERT_RULES, ALERT_MIN_DURATION)
+# Windowed aggregates of every sample; updated by the sampler only
+aggregates = WindowedAggregates(AGGREGATE_WINDOWS, AGGREGATE_METRICS)
+
+def get_stats(groups=None):
+    """Refresh the given collector groups (None: all) and return all stats
+
+    'sampled_at' maps each stat to the Unix time it was last refreshed.
+    """
+    # The collector reuses its record, so copy it before publishing
+    with timings.timer('sample'):
+        stats = dict(collector.sample(groups))
+    stats['sampled_at'] = {field: collector.sampled_at[field] for field in SELECTABLE_FIELDS}
     return stats
 
+def publish_snapshot(stats):
+    """Freeze a stats dict and make it the current snapshot"""
+    global latest_snapshot, snapshot_seq
+    now = time.monotonic()
+    stats['alerts'] = alert_state.update(stats, now)
+    with timings.timer('aggregates'):
+        stats['aggregates'] = aggregates.update(stats, now)
+    with snapshot_changed:
+        snapshot_seq += 1
+        stats['seq'] = snapshot_seq
+        stats['timestamp'] = time.time()
+        latest_snapshot = MappingProxyType(stats)
+        snapshot_changed.notify_all()
+    if multicast_sender is not None:
+        multicast_sender.send(stats)
+    with timings.timer('history'):
+        history.append(stats['timestamp'], stats)
+    if metrics_log is not None:
+        with timings.timer('metrics log'):
+            metrics_log.append(stats['timestamp'], stats)
+
+def sampler_loop():
+    """Sample each collector group every SAMPLE_PERIODS seconds into latest_snapshot
+
+    Every group is sampled on the first tick. After that, each tick
+    refreshes only the groups that are due and publishes them merged with
+    the last values of the rest.
+    """
+    next_due = dict.fromkeys(SAMPLE_PERIODS, time.monotonic() + SAMPLE_TICK)
+    while True:
+        time.sleep(max(0, min(next_due.values()) - time.monotonic()))
+        now = time.monotonic()
+        due = [group for group, at in next_due.items() if at <= now + SCHEDULE_SLACK]
+        if not due:
+            continue
+        try:
+            publish_snapshot(get_stats(due))
+        except Exception as e:
+            print(f"Error collecting stats: {e}")
+        for group in due:
+            next_due[group] += SAMPLE_PERIODS[group]
+            # If collection overran, skip missed ticks instead of bursting
+            if next_due[group] < now:
+                next_due[group] = now + SAMPLE_PERIODS[group]
+
+def start_sampler():
+    """Start the background sampler thread"""
+    thread = threading.Thread(target=sampler_loop, name='sampler', daemon=True)
+    thread.start()
+    return thread
+
+def wait_for_snapshot(after_seq, timeout):
+    """Wait until a snapshot newer than after_seq exists, or timeout
+
+    A client sequence number ahead of ours means this server restarted
+    since the client's last event, so the current snapshot counts as new.
+    """
+    def is_new():
+        return latest_snapshot is not None and latest_snapshot['seq'] != after_seq
+    with snapshot_changed:
+        snapshot_changed.wait_for(is_new, timeout)
+    return latest_snapshot if is_new() else None
+
+# Query parameter that selects each detail field of the snapshot
+DETAIL_PARAMS = dict(zip(('cores', 'ifaces', 'zones'), DETAIL_FIELDS))
+
+def select_details(data, args):
+    """Keep only the per-core/interface/zone details the client asked for
+
+    ?cores=0,2  ?ifaces=eth0  ?zones=cpu-thermal  select entries by name;
+    'all' selects every entry. Details not asked for are removed.
+    """
+    for param, field in DETAIL_PARAMS.items():
+        details = data.pop(field, None)
+        wanted = args.get(param)
+        if not wanted or details is None:
+            continue
+        if wanted == 'all':
+            data[field] = details
+        else:
+            names = wanted.split(',')
+            data[field] = {name: details[name] for name in names if name in details}
+    return data
+
+# Stats that ?fields= can select; the rest are always sent
+SELECTABLE_FIELDS = tuple(field for field in Collector.FIELDS if field not in DETAIL_FIELDS)
+ALWAYS_FIELDS = ('seq', 'timestamp', 'alerts') + DETAIL_FIELDS
+# Window labels ?windows= can select
+WINDOW_LABELS = tuple(window_label(seconds) for seconds in AGGREGATE_WINDOWS)
+
+def parse_fields(args):
+    """Return the set of stats named by ?fields=a,b, or None for all of them
+
+    Raises ValueError naming any field that does not exist.
+    """
+    wanted = args.get('fields')
+    if not wanted:
+        return None
+    fields = set(wanted.split(','))
+    unknown = fields.difference(SELECTABLE_FIELDS)
+    if unknown:
+        raise ValueError(f"Unknown fields: {', '.join(sorted(unknown))}. "
+                         f"Available: {', '.join(SELECTABLE_FIELDS)}")
+    return fields
+
+def parse_windows(args):
+    """Return the set of aggregate windows named by ?windows=1m,5m, or None for all
+
+    An empty ?windows= selects none. Windows this node does not keep are
+    dropped, since each node reads its own [aggregates]; the response
+    simply has no aggregates for them.
+    """
+    wanted = args.get('windows')
+    if wanted is None:
+        return None
+    return set(wanted.split(',')).intersection(WINDOW_LABELS) if wanted else set()
+
+def project(snapshot, fields=None, windows=None):
+    """Copy a snapshot, keeping only the given stats plus ALWAYS_FIELDS
+
+    Aggregates are kept for the given windows and, of those, the given stats.
+    """
+    if fields is None:
+        data = dict(snapshot)
+    else:
+        data = {field: snapshot[field] for field in (*fields, *ALWAYS_FIELDS) if field in snapshot}
+        if 'sampled_at' in snapshot:
+            data['sampled_at'] = {field: snapshot['sampled_at'][field] for field in fields}
+    if 'aggregates' in snapshot and (fields is not None or windows is not None):
+        data['aggregates'] = {
+            label: aggregates if fields is None else
+            {field: aggregate for field, aggregate in aggregates.items() if field in fields}
+            for label, aggregates in snapshot['aggregates'].items()
+            if windows is None or label in windows
+        }
+    data['age'] = time.time() - snapshot['timestamp']
+    return data
+
+def current_snapshot(fields=None, windows=None):
+    """Return the latest snapshot as a dict with its age, or None"""
+    snapshot = latest_snapshot
+    if snapshot is None:
+        return None
+    return project(snapshot, fields, windows)
+
+def snapshot_etag(seq):
+    """Unquoted ETag of a snapshot, unique across restarts of this server"""
+    return f"{BOOT_ID}-{seq}"
+
 @app.route('/stats')
 def stats():
-    """Return all system stats as JSON"""
+    """Return all system stats as JSON, or binary if the client accepts it
+
+    The ETag is the snapshot sequence number prefixed with BOOT_ID, so a
+    client sending If-None-Match for the snapshot it already has gets an
+    empty 304, but never for one from before the node restarted.
+    ?fields=temp,cpu_percent limits the response to those stats, and
+    ?windows=5m the aggregates to those windows.
+    """
     try:
-        data = get_stats()
-        return jsonify(data)
-    except Exception as e:
-        return jsonify({'error': str(e)}), 500
+        fields = parse_fields(request.args)
+        windows = parse_windows(request.args)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    data = current_snapshot(fields, windows)
+    if data is None:
+        return jsonify({'error': 'No stats sampled yet'}), 503
+    etag = snapshot_etag(data['seq'])
+    if request.if_none_match.contains(etag):
+        response = Response(status=304)
+    elif (version := wire.negotiate(request.headers.get('Accept', ''))) is not None:
+        response = Response(wire.encode(data, version), content_type=wire.media_type(version))
+    else:
+        response = jsonify(select_details(data, request.args))
+    response.set_etag(etag)
+    response.vary.add('Accept')
+    return response
+
+@app.route('/stats/stream')
+def stats_stream():
+    """Stream every new snapshot as Server-Sent Events
+
+    Event ids are snapshot sequence numbers. A reconnecting client sends
+    Last-Event-ID (or ?last_seq=) and resumes from the next snapshot.
+    ?fields= and ?windows= work as on /stats. Beyond MAX_STREAMS open
+    streams, new ones get a 503 so they can't take every worker.
+    """
+    try:
+        fields = parse_fields(request.args)
+        windows = parse_windows(request.args)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    if stream_slots is None or not stream_slots.acquire(blocking=False):
+        response = jsonify({'error': f'At most {MAX_STREAMS} streams can be open; poll /stats instead'})
+        response.status_code = 503
+        response.headers['Retry-After'] = str(STREAM_KEEPALIVE)
+        return response
+    last_seq = request.headers.get('Last-Event-ID', request.args.get('last_seq', ''))
+    try:
+        last_seq = int(last_seq)
+    except ValueError:
+        last_seq = 0
+
+    args = request.args.copy()
+
+    def generate():
+        seq = last_seq
+        while True:
+            snapshot = wait_for_snapshot(seq, STREAM_KEEPALIVE)
+            if snapshot is None:
+                yield ": keepalive\n\n"
+                continue
+            seq = snapshot['seq']
+            data = select_details(project(snapshot, fields, windows), args)
+            yield f"id: {seq}\ndata: {json.dumps(data)}\n\n"
+
+    response = Response(generate(), mimetype='text/event-stream',
+                        headers={'Cache-Control': 'no-cache'})
+    # Called by the WSGI server when the client disconnects or the stream ends
+    response.call_on_close(stream_slots.release)
+    return response
 
 @app.route('/temp')
 def temperature():
     """Return temperature as JSON (legacy endpoint)"""
-    temp = get_temp()
-    if temp is not None:
-        return jsonify({'temp': temp})
-    else:
+    data = current_snapshot()
+    if data is None or data.get('temp') is None:
         return jsonify({'error': 'Unable to read temperature'}), 500
+    return jsonify({'temp': data['temp'], 'timestamp': data['timestamp'], 'age': data['age']})
 
 @app.route('/health')
 def health():
     """Health check endpoint"""
-    return jsonify({'status': 'ok'})
+    data = current_snapshot()
+    if data is None:
+        return jsonify({'status': 'starting'})
+    return jsonify({'status': 'ok', 'age': data['age']})
+
+# Prometheus metrics: (name, type, help, snapshot field, scale)
+PROMETHEUS_METRICS = (
+    ('tp2_temperature_celsius', 'gauge', 'CPU temperature', 'temp', 1),
+    ('tp2_cpu_usage_percent', 'gauge', 'CPU usage', 'cpu_percent', 1),
+    ('tp2_load_average_1m', 'gauge', '1-minute load average', 'load_avg', 1),
+    ('tp2_memory_usage_percent', 'gauge', 'RAM usage', 'ram_percent', 1),
+    ('tp2_memory_used_bytes', 'gauge', 'RAM used', 'ram_used_mb', 1024 * 1024),
+    ('tp2_memory_total_bytes', 'gauge', 'RAM total', 'ram_total_mb', 1024 * 1024),
+    ('tp2_disk_usage_percent', 'gauge', 'Root filesystem usage', 'disk_percent', 1),
+    ('tp2_disk_free_bytes', 'gauge', 'Root filesystem free space', 'disk_free_gb', 1024 * 1024 * 1024),
+    ('tp2_network_sent_bytes_total', 'counter', 'Bytes sent on physical interfaces', 'net_sent_bytes', 1),
+    ('tp2_network_received_bytes_total', 'counter', 'Bytes received on physical interfaces', 'net_recv_bytes', 1),
+    ('tp2_uptime_seconds', 'gauge', 'Time since boot', 'uptime_hours', 3600),
+    ('tp2_sample_timestamp_seconds', 'gauge', 'Unix time the snapshot was sampled', 'timestamp', 1),
+)
+
+# (seq, text) of the last /metrics rendering; reused until the next sample
+metrics_cache = (None, '')
+
+def render_metrics(snapshot):
+    """Render a snapshot in the Prometheus text exposition format"""
+    lines = []
+    for name, metric_type, help_text, field, scale in PROMETHEUS_METRICS:
+        value = snapshot.get(field)
+        if value is None:
+            continue
+        lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} {metric_type}")
+        lines.append(f"{name} {value * scale!r}")
+    return '\n'.join(lines) + '\n'
+
+@app.route('/metrics')
+def metrics():
+    """Prometheus scrape endpoint, rendered from the cached snapshot"""
+    global metrics_cache
+    snapshot = latest_snapshot
+    if snapshot is None:
+        return Response('', mimetype='text/plain; version=0.0.4')
+    seq, text = metrics_cache
+    if seq != snapshot['seq']:
+        text = render_metrics(snapshot)
+        metrics_cache = (snapshot['seq'], text)
+    return Response(text, mimetype='text/plain; version=0.0.4')
+
+@app.route('/history')
+def history_buckets():
+    """Return one metric's history as min/avg/max buckets
+
+    Query parameters:
+      metric - one of history.METRICS (required)
+      since  - Unix time, or negative seconds relative to now (default: -3600)
+      until  - Unix time, or negative seconds relative to now (default: now)
+      step   - bucket width in seconds (default: range / 60)
+
+    Ranges older than the in-memory history are read from the metrics
+    log, when one is configured.
+    """
+    metric = request.args.get('metric')
+    if metric not in METRICS:
+        return jsonify({'error': f"metric must be one of: {', '.join(METRICS)}"}), 400
+    now = time.time()
+    try:
+        since = float(request.args.get('since', -3600))
+        until = float(request.args.get('until', now))
+        since = now + since if since < 0 else since
+        until = now + until if until < 0 else until
+        step = float(request.args.get('step', (until - since) / 60))
+        if not all(math.isfinite(value) for value in (since, until, step)):
+            raise ValueError("not finite")
+    except ValueError:
+        return jsonify({'error': 'since, until and step must be finite numbers'}), 400
+    if until <= since:
+        return jsonify({'error': 'until must be after since'}), 400
+    step = max(step, SAMPLE_TICK, (until - since) / MAX_BUCKETS)
+    split = since
+    oldest = history.oldest()
+    if metrics_log is not None and (oldest is None or since < oldest):
+        # Buckets before the ring's oldest sample come from the disk log;
+        # split on a bucket boundary so both parts share one grid
+        boundary = until if oldest is None else min(until, oldest)
+        split = min(until, since + math.ceil((boundary - since) / step) * step)
+    buckets = []
+    if split > since:
+        buckets = metrics_log.buckets(metric, since, split, step)[1]
+    if split < until:
+        buckets += history.buckets(metric, split, until, step)[1]
+    return jsonify({'metric': metric, 'since': since, 'until': until,
+                    'step': step, 'buckets': buckets})
+
+@app.before_request
+def start_request_timer():
+    g.request_start = time.perf_counter()
+
+@app.after_request
+def record_request_time(response):
+    """Time each request by route; unmatched paths are not recorded"""
+    if request.url_rule is not None:
+        timings.record(f"request {request.url_rule.rule}", time.perf_counter() - g.request_start)
+    return response
+
+@app.route('/debug/timings')
+def debug_timings():
+    """Rolling latency percentiles of sampling, history and each route"""
+    return jsonify({'enabled': timings.enabled, 'window': timings.window,
+                    'phases': timings.summary()})
+
+def etag_matches(if_none_match, etag):
+    """True if an If-None-Match header lists etag (quoted) or '*'"""
+    tags = [tag.strip() for tag in if_none_match.split(',')]
+    return '*' in tags or any(tag.removeprefix('W/') == etag for tag in tags)
+
+def async_stats(request):
+    """/stats for the asyncio server; same parameters and caching as stats()"""
+    try:
+        fields = parse_fields(request.args)
+        windows = parse_windows(request.args)
+    except ValueError as e:
+        return json_response(400, {'error': str(e)})
+    data = current_snapshot(fields, windows)
+    if data is None:
+        return json_response(503, {'error': 'No stats sampled yet'})
+    etag = f'"{snapshot_etag(data["seq"])}"'
+    headers = {'ETag': etag, 'Vary': 'Accept'}
+    if etag_matches(request.headers.get('if-none-match', ''), etag):
+        return 304, headers, b''
+    version = wire.negotiate(request.headers.get('accept', ''))
+    if version is not None:
+        return 200, dict(headers, **{'Content-Type': wire.media_type(version)}), wire.encode(data, version)
+    return json_response(200, select_details(data, request.args), headers)
+
+def async_temperature(request):
+    """/temp for the asyncio server"""
+    data = current_snapshot()
+    if data is None or data.get('temp') is None:
+        return json_response(500, {'error': 'Unable to read temperature'})
+    return json_response(200, {'temp': data['temp'], 'timestamp': data['timestamp'], 'age': data['age']})
+
+def async_health(request):
+    """/health for the asyncio server"""
+    data = current_snapshot()
+    if data is None:
+        return json_response(200, {'status': 'starting'})
+    return json_response(200, {'status': 'ok', 'age': data['age']})
+
+ASYNC_ROUTES = {
+    '/stats': async_stats,
+    '/temp': async_temperature,
+    '/health': async_health,
+}
+
+def run_async_server():
+    """Serve the polling routes from a single asyncio event loop"""
+    print(f"Serving /stats, /temp and /health on port {NODE_PORT} with asyncio")
+    server = AsyncHTTPServer(ASYNC_ROUTES, on_request=lambda path, seconds:
+                             timings.record(f"request {path}", seconds))
+    server.run('0.0.0.0', NODE_PORT)
+
+def run_server():
+    """Serve the app on all interfaces with a threaded keep-alive WSGI server"""
+    if SERVER == 'asyncio':
+        run_async_server()
+        return
+    try:
+        from waitress import serve
+    except ImportError:
+        print("waitress not installed, falling back to Flask development server")
+        print("  Install with: pip3 install waitress")
+        app.run(host='0.0.0.0', port=NODE_PORT, threaded=True)
+        return
+    print(f"Serving on port {NODE_PORT} with {SERVER_THREADS} threads")
+    serve(app, host='0.0.0.0', port=NODE_PORT, threads=SERVER_THREADS)
 
 if __name__ == '__main__':
-    # Run on all interfaces, port 5000
-    app.run(host='0.0.0.0', port=5000)
+    print(f"History: {history.capacity} samples, {history.memory_bytes() / (1024 * 1024):.1f} MB")
+    unknown = set(AGGREGATE_METRICS).difference(SELECTABLE_FIELDS)
+    if unknown:
+        print(f"Warning: [aggregates] metrics has unknown stats: {', '.join(sorted(unknown))}")
+    if AGGREGATE_WINDOWS and AGGREGATE_METRICS:
+        print(f"Aggregates: {', '.join(AGGREGATE_METRICS)} over {', '.join(WINDOW_LABELS)}")
+    if metrics_log is not None:
+        print(f"Metrics log: {METRICS_LOG}, flushed every {METRICS_LOG_FLUSH:g}s")
+        # Write out the last batch on shutdown
+        atexit.register(metrics_log.flush)
+        signal.signal(signal.SIGTERM, lambda sig, frame: sys.exit(0))
+    start_sampler()
+    run_server()
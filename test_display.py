@@ -57,8 +57,8 @@ except Exception as e:
 print()
 print("Scanning for display at I2C addresses...")
 
-# Convert hex string to int
-addr = int(I2C_ADDRESS, 16) if isinstance(I2C_ADDRESS, str) else I2C_ADDRESS
+# Convert hex string to int; 'auto' just tries the common addresses
+addr = 0x3C if I2C_ADDRESS.strip().lower() == 'auto' else int(I2C_ADDRESS, 16)
 
 # Try common I2C addresses
 addresses_to_try = [addr]
@@ -0,0 +1,80 @@
+"""
+Rolling aggregates checked against a brute-force recomputation
+"""
+
+import math
+import random
+import pytest
+from aggregates import (BIN_ACCURACY, RollingWindow, WindowedAggregates, bin_index,
+                        bin_value, parse_duration, window_label)
+
+def brute_force(samples, now, seconds):
+    values = sorted(value for t, value in samples if t > now - seconds and value is not None)
+    if not values:
+        return None
+    return {
+        'min': values[0],
+        'avg': sum(values) / len(values),
+        'max': values[-1],
+        'p95': values[math.ceil(0.95 * len(values)) - 1],
+    }
+
+def test_parse_duration_and_label():
+    assert parse_duration('90') == 90
+    assert parse_duration(' 5m ') == 300
+    assert parse_duration('1h') == 3600
+    assert [window_label(s) for s in (60, 90, 300, 900, 3600)] == ['1m', '90s', '5m', '15m', '1h']
+    with pytest.raises(ValueError):
+        parse_duration('0s')
+    with pytest.raises(ValueError):
+        parse_duration('soon')
+
+def test_bins_within_accuracy():
+    for value in (0.02, 0.5, 1.0, 42.3, 99.9, 100.0, 12345.6):
+        assert abs(bin_value(bin_index(value)) - value) <= BIN_ACCURACY * value * 1.0001
+    assert bin_index(0.0) == 0
+    assert bin_value(0) == 0.0
+
+def test_windows_match_brute_force():
+    rng = random.Random(1)
+    windows = (60, 300, 900)
+    aggregates = WindowedAggregates(windows, ('cpu_percent', 'temp'))
+    samples = {'cpu_percent': [], 'temp': []}
+    for t in range(2500):
+        # Mostly idle with short spikes to 100%, and gaps in temp
+        cpu = 100.0 if t % 37 == 0 else round(rng.uniform(0, 30), 1)
+        temp = None if t % 50 == 0 else round(45 + 10 * math.sin(t / 200), 1)
+        stats = {'cpu_percent': cpu, 'temp': temp}
+        for metric in samples:
+            samples[metric].append((t, stats[metric]))
+        result = aggregates.update(stats, t)
+        if t % 7:
+            continue
+        for seconds in windows:
+            for metric, history in samples.items():
+                expected = brute_force(history, t, seconds)
+                actual = result[window_label(seconds)].get(metric)
+                if expected is None:
+                    assert actual is None
+                    continue
+                assert actual['min'] == expected['min']
+                assert actual['max'] == expected['max']
+                assert actual['avg'] == pytest.approx(expected['avg'], abs=0.051)
+                # Bin accuracy plus rounding to one decimal
+                assert abs(actual['p95'] - expected['p95']) <= BIN_ACCURACY * expected['p95'] + 0.051
+
+def test_window_expires_everything():
+    window = RollingWindow(10)
+    window.add(0, 5.0, bin_index(5.0))
+    window.add(5, 7.0, bin_index(7.0))
+    assert window.result()['max'] == 7.0
+    window.expire(15)
+    assert window.result() is None
+    assert sum(window.counts) == 0
+    assert window.total == 0.0
+
+def test_small_window_p95_not_below_average():
+    window = RollingWindow(60)
+    for t, value in enumerate((0.0, 5.0)):
+        window.add(t, value, bin_index(value))
+    assert window.result() == {'min': 0.0, 'avg': 2.5, 'max': 5.0, 'p95': 5.0}
@@ -0,0 +1,38 @@
+"""
+Threshold alerts: min_duration, hysteresis and the wire bitmask
+"""
+
+import configparser
+from alerts import ALERT_NAMES, AlertState, Rule, alert_mask, alert_names, parse_rules
+
+def make_config(**alerts):
+    config = configparser.ConfigParser()
+    config['alerts'] = alerts
+    return config
+
+def test_parse_rules():
+    rules = {rule.name: rule for rule in parse_rules(make_config(temp='70', disk=''))}
+    assert rules['temp'] == Rule('temp', 'temp', 70.0, 70.0)
+    assert rules['cpu'] == Rule('cpu', 'cpu_percent', 95.0, 85.0)
+    assert 'disk' not in rules
+
+def test_raise_after_min_duration_and_clear_with_hysteresis():
+    state = AlertState([Rule('temp', 'temp', 80.0, 75.0)], min_duration=30)
+    assert state.update({'temp': 85.0}, 0) == []
+    assert state.update({'temp': 85.0}, 29) == []
+    assert state.update({'temp': 85.0}, 30) == ['temp']
+    # Between clear_at and raise_at: stays raised
+    assert state.update({'temp': 77.0}, 31) == ['temp']
+    assert state.update({'temp': None}, 32) == ['temp']
+    assert state.update({'temp': 74.9}, 33) == []
+
+def test_dip_restarts_min_duration():
+    state = AlertState([Rule('cpu', 'cpu_percent', 95.0, 85.0)], min_duration=10)
+    state.update({'cpu_percent': 99.0}, 0)
+    state.update({'cpu_percent': 50.0}, 5)
+    assert state.update({'cpu_percent': 99.0}, 12) == []
+    assert state.update({'cpu_percent': 99.0}, 22) == ['cpu']
+
+def test_mask_round_trip():
+    for names in ([], ['temp'], ['cpu', 'disk'], list(ALERT_NAMES)):
+        assert alert_names(alert_mask(names)) == names
@@ -0,0 +1,72 @@
+"""
+Request parsing and response framing of the asyncio stats server
+"""
+
+import asyncio
+import pytest
+from async_http import AsyncHTTPServer, encode_response, json_response, parse_head
+
+def test_parse_head():
+    request, version = parse_head(b'GET /stats?fields=temp,cpu_percent&windows=&fields=x HTTP/1.1\r\n'
+                                  b'Host: node1\r\nAccept: application/json\r\n\r\n')
+    assert version == 'HTTP/1.1'
+    assert request.method == 'GET'
+    assert request.path == '/stats'
+    assert request.args == {'fields': 'temp,cpu_percent', 'windows': ''}
+    assert request.headers == {'host': 'node1', 'accept': 'application/json'}
+
+def test_parse_head_malformed():
+    with pytest.raises(ValueError):
+        parse_head(b'GARBAGE\r\n\r\n')
+
+def test_encode_response():
+    status, headers, body = json_response(404, {'error': 'Not found'})
+    response = encode_response(status, headers, body, keep_alive=False)
+    head, _, rest = response.partition(b'\r\n\r\n')
+    lines = head.decode().split('\r\n')
+    assert lines[0] == 'HTTP/1.1 404 Not Found'
+    assert 'Content-Type: application/json' in lines
+    assert f'Content-Length: {len(body)}' in lines
+    assert 'Connection: close' in lines
+    assert rest == body
+
+def test_http10_keep_alive_announced():
+    response = encode_response(200, {}, b'{}', keep_alive=True, version='HTTP/1.0')
+    assert b'Connection: keep-alive\r\n' in response
+    response = encode_response(200, {}, b'{}', keep_alive=True)
+    assert b'Connection:' not in response
+
+def exchange(requests):
+    """Send raw requests over one connection to a test server, return everything read"""
+    async def run():
+        server = AsyncHTTPServer({'/stats': lambda request: json_response(200, {'ok': True})})
+        listener = await asyncio.start_server(server.handle_connection, '127.0.0.1', 0)
+        port = listener.sockets[0].getsockname()[1]
+        async with listener:
+            reader, writer = await asyncio.open_connection('127.0.0.1', port)
+            writer.write(requests)
+            await writer.drain()
+            data = await asyncio.wait_for(reader.read(), timeout=5)
+            writer.close()
+            return data
+    return asyncio.run(run())
+
+def test_request_body_skipped():
+    data = exchange(b'POST /stats HTTP/1.1\r\nContent-Length: 11\r\n\r\nhello world'
+                    b'GET /stats HTTP/1.1\r\nConnection: close\r\n\r\n')
+    assert data.count(b'HTTP/1.1 ') == 2
+    assert b'405 Method Not Allowed' in data
+    assert data.endswith(b'{"ok": true}')
+
+def test_chunked_body_closes_connection():
+    data = exchange(b'POST /stats HTTP/1.1\r\nTransfer-Encoding: chunked\r\n\r\n'
+                    b'5\r\nhello\r\n0\r\n\r\nGET /stats HTTP/1.1\r\n\r\n')
+    assert data.count(b'HTTP/1.1 ') == 1
+    assert b'Connection: close' in data
+
+def test_http10_keep_alive_connection():
+    data = exchange(b'GET /stats HTTP/1.0\r\nConnection: keep-alive\r\n\r\n'
+                    b'GET /stats HTTP/1.0\r\n\r\n')
+    first, _, second = data.partition(b'{"ok": true}')
+    assert b'Connection: keep-alive' in first
+    assert b'Connection: close' in second
@@ -0,0 +1,83 @@
+"""
+Collector group selection and /proc parsing, on this machine's /proc and /sys
+"""
+
+import sys
+import pytest
+
+pytestmark = pytest.mark.skipif(not sys.platform.startswith('linux'), reason="reads /proc")
+
+def test_sample_only_given_groups():
+    from collector import Collector
+    collector = Collector()
+    collector.sample()
+    before = dict(collector.sampled_at)
+    assert all(before[field] is not None for field in Collector.GROUPS['uptime'])
+
+    collector.sample([])
+    assert collector.sampled_at == before
+
+    collector.sample(['uptime'])
+    for group, fields in Collector.GROUPS.items():
+        for field in fields:
+            if group == 'uptime':
+                assert collector.sampled_at[field] >= before[field]
+            else:
+                assert collector.sampled_at[field] == before[field]
+
+NET_DEV = (b'Inter-|   Receive                            |  Transmit\n'
+           b' face |bytes    packets errs drop fifo frame compressed multicast|bytes    packets\n'
+           b'  eth0: 1000 10 0 0 0 0 0 0 2000 20 0 0 0 0 0 0\n'
+           b'    lo: 50 1 0 0 0 0 0 0 50 1 0 0 0 0 0 0\n'
+           b'veth1a2b: 300 3 0 0 0')
+
+def test_proc_file_read_grows(tmp_path):
+    from collector import ProcFile
+    path = tmp_path / 'big'
+    data = bytes(range(256)) * 40
+    path.write_bytes(data)
+    proc_file = ProcFile(str(path), 64)
+    assert proc_file.read() == data
+    assert proc_file.size > len(data)
+    proc_file.close()
+
+def test_net_bytes_skips_cut_off_lines(tmp_path):
+    from collector import Collector, ProcFile
+    path = tmp_path / 'dev'
+    path.write_bytes(NET_DEV)
+    collector = Collector()
+    collector.netdev.close()
+    collector.netdev = ProcFile(str(path), 64)
+    assert collector.read_net_bytes() == {'eth0': (2000, 1000), 'lo': (50, 50)}
+
+def net_dev(**interfaces):
+    """/proc/net/dev contents for {name: (received, sent)} bytes"""
+    lines = [b'Inter-|   Receive\n', b' face |bytes\n']
+    lines += [f'{name}: {rx} 0 0 0 0 0 0 0 {tx} 0 0 0 0 0 0 0\n'.encode()
+              for name, (rx, tx) in interfaces.items()]
+    return b''.join(lines)
+
+def test_net_totals_physical_and_monotonic(tmp_path):
+    from collector import Collector, ProcFile
+    path = tmp_path / 'dev'
+    path.write_bytes(net_dev(eth0=(1000, 500), eth1=(0, 0), lo=(50, 50)))
+    collector = Collector()
+    collector.netdev.close()
+    collector.netdev = ProcFile(str(path))
+    collector.virtual_interfaces = {'eth0': False, 'eth1': False, 'lo': True, 'veth1': True}
+
+    def sample(**interfaces):
+        path.write_bytes(net_dev(**interfaces))
+        collector.sample(['network'])
+        return collector.record['net_recv_bytes'], collector.record['net_sent_bytes']
+
+    collector.last_net = (collector.read_net_bytes(), collector.last_net[1])
+    collector.net_totals = [0, 0]
+
+    # Loopback and veth traffic never counts
+    assert sample(eth0=(1600, 700), eth1=(0, 0), lo=(9000, 9000), veth1=(10, 10)) == (600, 200)
+    # A counter that went down was reset: count it from zero
+    assert sample(eth0=(100, 50), eth1=(0, 0), lo=(9000, 9000)) == (700, 250)
+    # An interface that disappears doesn't take its bytes with it
+    assert sample(eth1=(30, 20)) == (730, 270)
+    assert set(collector.record['interfaces']) == {'eth1'}
@@ -0,0 +1,29 @@
+"""
+SSD1306 page packing and dirty column detection
+"""
+
+import random
+from PIL import Image
+from framebuffer import changed_columns, image_to_pages
+
+def reference_pages(image, pages):
+    """Pack pixel by pixel: bit n of a column byte is row 8 * page + n"""
+    pixels = image.load()
+    return [bytes(sum(1 << bit for bit in range(8) if pixels[x, page * 8 + bit])
+                  for x in range(image.width))
+            for page in range(pages)]
+
+def test_image_to_pages_matches_reference():
+    rng = random.Random(3)
+    image = Image.new('1', (128, 64))
+    for _ in range(1500):
+        image.putpixel((rng.randrange(128), rng.randrange(64)), 1)
+    assert image_to_pages(image, 8) == reference_pages(image, 8)
+
+def test_changed_columns():
+    old = bytes(128)
+    assert changed_columns(old, old) is None
+    new = bytearray(old)
+    new[5] = 1
+    new[90] = 0x80
+    assert changed_columns(old, bytes(new)) == (5, 90)
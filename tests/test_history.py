@@ -0,0 +1,37 @@
+"""
+Ring buffer history downsampling checked against a brute-force reduction
+"""
+
+import math
+import pytest
+from history import RingHistory
+
+def test_buckets_after_wraparound():
+    history = RingHistory(100)
+    for t in range(250):
+        history.append(float(t), {'temp': float(t % 17), 'cpu_percent': None})
+    assert history.oldest() == 150.0
+    step, buckets = history.buckets('temp', 140.0, 250.0, 10.0)
+    assert step == 10.0
+    assert [bucket['t'] for bucket in buckets] == [150.0 + 10 * i for i in range(10)]
+    for bucket in buckets:
+        values = [float(t % 17) for t in range(int(bucket['t']), int(bucket['t']) + 10)]
+        assert bucket['min'] == min(values)
+        assert bucket['max'] == max(values)
+        assert bucket['avg'] == pytest.approx(sum(values) / len(values))
+        assert bucket['count'] == len(values)
+
+def test_missing_values_skipped():
+    history = RingHistory(10)
+    history.append(0.0, {'temp': 40.0})
+    history.append(1.0, {'temp': None})
+    history.append(2.0, {})
+    _, buckets = history.buckets('temp', 0.0, 3.0, 3.0)
+    assert buckets == [{'t': 0.0, 'min': 40.0, 'max': 40.0, 'avg': 40.0, 'count': 1}]
+    _, buckets = history.buckets('cpu_percent', 0.0, 3.0, 3.0)
+    assert buckets == []
+
+def test_step_widened_to_bucket_limit():
+    history = RingHistory(10)
+    step, _ = history.buckets('temp', 0.0, 10000.0, 1.0)
+    assert math.isclose(step, 10.0)
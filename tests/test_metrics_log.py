@@ -0,0 +1,54 @@
+"""
+On-disk metrics log queries across flushed files and the pending batch
+"""
+
+import pytest
+from metrics_log import MetricsLog
+
+def test_buckets_include_pending_samples(tmp_path):
+    log = MetricsLog(str(tmp_path / 'metrics.log'), flush_interval=3600)
+    for t in range(10):
+        log.append(float(t), {'temp': float(t)})
+    log.flush()
+    for t in range(10, 20):
+        log.append(float(t), {'temp': float(t)})
+    assert len(log.pending) == 10 * log.record.size
+    _, buckets = log.buckets('temp', 0.0, 20.0, 5.0)
+    assert [(bucket['t'], bucket['count']) for bucket in buckets] == [
+        (0.0, 5), (5.0, 5), (10.0, 5), (15.0, 5)]
+    assert buckets[2]['min'] == 10.0
+    assert buckets[3]['avg'] == pytest.approx(17.0)
+
+def test_bucket_split_across_flush(tmp_path):
+    log = MetricsLog(str(tmp_path / 'metrics.log'), flush_interval=3600)
+    for t in range(8):
+        log.append(float(t), {'temp': float(t)})
+        if t == 5:
+            log.flush()
+    _, buckets = log.buckets('temp', 0.0, 8.0, 8.0)
+    assert buckets == [{'t': 0.0, 'min': 0.0, 'max': 7.0, 'avg': 3.5, 'count': 8}]
+
+def test_unwritable_path_raises(tmp_path):
+    blocker = tmp_path / 'file'
+    blocker.write_text('')
+    with pytest.raises(OSError):
+        MetricsLog(str(blocker / 'metrics.log'))
+
+def test_write_errors_keep_newest_pending(tmp_path, capsys):
+    log = MetricsLog(str(tmp_path / 'metrics.log'), flush_interval=0)
+    record_size = log.record.size
+    log.max_pending = 10 * record_size
+    log.path = str(tmp_path / 'missing' / 'metrics.log')
+    for t in range(25):
+        log.append(float(t), {'temp': float(t)})
+    assert capsys.readouterr().out.count('Warning') == 1
+    assert len(log.pending) == 10 * record_size
+    _, buckets = log.buckets('temp', 0.0, 25.0, 25.0)
+    assert (buckets[0]['min'], buckets[0]['count']) == (15.0, 10)
+
+    log.path = str(tmp_path / 'metrics.log')
+    log.append(25.0, {'temp': 25.0})
+    assert not log.pending
+    assert 'writable again' in capsys.readouterr().out
+    _, buckets = log.buckets('temp', 0.0, 26.0, 26.0)
+    assert (buckets[0]['min'], buckets[0]['max'], buckets[0]['count']) == (15.0, 25.0, 11)
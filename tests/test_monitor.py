@@ -0,0 +1,141 @@
+"""
+temp_monitor.py logic that needs no display: /cluster, the breaker, stale stats
+"""
+
+import json
+import threading
+import pytest
+import requests
+import wire
+import temp_monitor
+
+FULL = {field: 1.0 for field in temp_monitor.CLUSTER_FIELDS}
+
+@pytest.fixture(autouse=True)
+def nodes(monkeypatch):
+    monkeypatch.setattr(temp_monitor, 'OTHER_NODES', ['node1', 'node2', 'node3'])
+
+def cluster_nodes(all_stats):
+    temp_monitor.publish_cluster(all_stats)
+    return json.loads(temp_monitor.cluster_body)['nodes']
+
+def test_cluster_omitted_lists_missing_fields():
+    binary = wire.decode(wire.encode(dict(FULL, seq=1, timestamp=1.0)))
+    projected = {'seq': 2, 'timestamp': 1.0, 'temp': 40.0, 'cpu_percent': 5.0}
+    nodes = cluster_nodes({'Node0': dict(FULL), 'Node1': binary, 'Node2': projected, 'Node3': None})
+    assert nodes['node0']['omitted'] == []
+    assert set(nodes['node1']['omitted']) == {'net_sent_bytes', 'net_recv_bytes', 'sampled_at'}
+    assert 'temp' not in nodes['node2']['omitted']
+    assert {'ram_percent', 'uptime_hours', 'sampled_at'} <= set(nodes['node2']['omitted'])
+    assert nodes['node3'] == dict(nodes['node3'], online=False, omitted=[], stats=None)
+
+class Clock:
+    """Stands in for time.monotonic()"""
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+def fake_response_error(status):
+    response = requests.Response()
+    response.status_code = status
+    return requests.exceptions.HTTPError(f"{status} Error", response=response)
+
+@pytest.fixture
+def node(monkeypatch):
+    """A remote node whose fetch results the test queues up: stats dicts or exceptions"""
+    results, probes = [], []
+    def fetch(name):
+        result = results.pop(0)
+        if isinstance(result, Exception):
+            raise result
+        return result
+    clock = Clock()
+    monkeypatch.setattr(temp_monitor.time, 'monotonic', clock)
+    monkeypatch.setattr(temp_monitor, 'fetch_remote_stats', fetch)
+    monkeypatch.setattr(temp_monitor, 'probe_node', probes.append)
+    monkeypatch.setattr(temp_monitor, 'reset_node_connection', lambda name: None)
+    monkeypatch.setattr(temp_monitor, 'node_health', {})
+    monkeypatch.setattr(temp_monitor, 'OFFLINE_FAILURES', 3)
+    return results, probes, clock
+
+def test_breaker_opens_after_consecutive_failures(node):
+    results, probes, clock = node
+    get = temp_monitor.get_remote_stats
+    results += [{'temp': 40.0}, OSError('down'), OSError('down')]
+    assert get('node1') == {'temp': 40.0}
+    # Below the threshold the node is retried and shown stale
+    assert get('node1') == {'temp': 40.0, 'stale': True}
+    assert get('node1') == {'temp': 40.0, 'stale': True}
+    assert not temp_monitor.breaker_open('node1')
+
+    results.append(OSError('down'))
+    assert get('node1') is None
+    assert temp_monitor.breaker_open('node1')
+    # Skipped while open: nothing fetched, nothing probed
+    assert get('node1') is None
+    assert results == [] and probes == []
+
+    clock.now += 1
+    results.append({'temp': 41.0})
+    assert get('node1') == {'temp': 41.0}
+    assert probes == ['node1']
+    assert temp_monitor.node_health['node1']['failures'] == 0
+
+def test_breaker_backoff_doubles(node):
+    results, probes, clock = node
+    results += [OSError('down')] * 5
+    for _ in range(3):
+        temp_monitor.get_remote_stats('node1')
+    health = temp_monitor.node_health['node1']
+    assert health['next_probe'] == clock.now + 1
+    clock.now += 1
+    temp_monitor.get_remote_stats('node1')
+    assert health['next_probe'] == clock.now + 2
+    clock.now += 2
+    temp_monitor.get_remote_stats('node1')
+    assert health['next_probe'] == clock.now + 4
+
+def test_rejected_request_is_not_a_failure(node):
+    results, probes, clock = node
+    results += [{'temp': 40.0}] + [fake_response_error(400)] * 5 + [fake_response_error(503)]
+    temp_monitor.get_remote_stats('node1')
+    for _ in range(5):
+        assert temp_monitor.get_remote_stats('node1') == {'temp': 40.0, 'stale': True}
+    assert temp_monitor.node_health['node1']['failures'] == 0
+    temp_monitor.get_remote_stats('node1')
+    assert temp_monitor.node_health['node1']['failures'] == 1
+
+def test_fetch_all_stats_keeps_last_known_when_late(monkeypatch):
+    released = threading.Event()
+    calls = []
+    def remote(name):
+        calls.append(name)
+        if name == 'node2':
+            released.wait(5)
+        return {'node': name}
+    monkeypatch.setattr(temp_monitor, 'OTHER_NODES', ['node1', 'node2'])
+    monkeypatch.setattr(temp_monitor, 'get_local_stats', lambda: {'node': 'local'})
+    monkeypatch.setattr(temp_monitor, 'get_remote_stats', remote)
+    monkeypatch.setattr(temp_monitor, 'FETCH_DEADLINE', 0.05)
+    monkeypatch.setattr(temp_monitor, 'pending_fetches', {})
+    monkeypatch.setattr(temp_monitor, 'last_known_stats', {})
+    try:
+        # node2 misses the deadline and has never answered
+        assert temp_monitor.fetch_all_stats() == {
+            'Node0': {'node': 'local'}, 'Node1': {'node': 'node1'}, 'Node2': None}
+        released.set()
+        temp_monitor.pending_fetches['Node2'].result(timeout=5)
+        assert temp_monitor.fetch_all_stats()['Node2'] == {'node': 'node2'}
+
+        # Late again: last-known stats, marked stale, not fetched twice at once
+        released.clear()
+        assert temp_monitor.fetch_all_stats()['Node2'] == {'node': 'node2', 'stale': True}
+        assert temp_monitor.fetch_all_stats()['Node2'] == {'node': 'node2', 'stale': True}
+        # Once for the first two cycles (the second collected it), once since
+        assert calls.count('node2') == 2
+        assert temp_monitor.last_known_stats['Node2'] == {'node': 'node2'}
+    finally:
+        released.set()
@@ -0,0 +1,51 @@
+"""
+Multicast sequence tracking over real sockets on the loopback interface
+"""
+
+import socket
+import time
+import pytest
+from multicast import MulticastListener, MulticastSender
+
+GROUP = '239.255.42.99'
+
+@pytest.fixture
+def link():
+    """(sender, listener) joined to GROUP on 127.0.0.1, or skip without multicast"""
+    with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as probe:
+        probe.bind(('127.0.0.1', 0))
+        port = probe.getsockname()[1]
+    try:
+        listener = MulticastListener(GROUP, port, interface='127.0.0.1', poll_timeout=1.0)
+        sender = MulticastSender(GROUP, port, name='node1', interface='127.0.0.1')
+    except OSError as e:
+        pytest.skip(f"No loopback multicast here: {e}")
+    yield sender, listener
+    sender.sock.close()
+    listener.sock.close()
+
+def deliver(sender, listener, seq, timestamp):
+    """Send one snapshot and hand the datagram that arrives to the listener"""
+    sender.send({'seq': seq, 'timestamp': timestamp, 'temp': 40.0 + seq})
+    try:
+        data, (addr, _) = listener.sock.recvfrom(2048)
+    except socket.timeout:
+        pytest.skip("Loopback multicast datagrams are not delivered here")
+    listener.handle(data, addr, time.monotonic())
+
+def test_loss_reorder_and_restart(link):
+    sender, listener = link
+    start = 1700000000.0
+    for seq in (1, 2, 5, 4):
+        deliver(sender, listener, seq, start + seq)
+    feed = listener.feed('node1')
+    # 3 and 4 went missing, then 4 turned up late
+    assert feed.counters() == {'received': 4, 'lost': 1, 'reordered': 1, 'restarts': 0}
+    assert feed.seq == 5 and feed.stats['temp'] == 45.0
+
+    # The node restarts: its sequence starts over, its clock keeps going
+    deliver(sender, listener, 1, start + 100)
+    deliver(sender, listener, 2, start + 101)
+    assert feed.counters() == {'received': 6, 'lost': 1, 'reordered': 1, 'restarts': 1}
+    assert feed.seq == 2 and feed.stats['timestamp'] == start + 101
+    assert listener.get('node1', max_age=10) is feed.stats
@@ -0,0 +1,80 @@
+"""
+temp_server.py request handling through Flask's test client
+"""
+
+import pytest
+import temp_server
+
+@pytest.fixture
+def client():
+    return temp_server.app.test_client()
+
+@pytest.mark.parametrize('query', ['since=nan', 'until=inf', 'since=-inf', 'step=nan'])
+def test_history_rejects_non_finite(client, query):
+    response = client.get(f'/history?metric=temp&{query}')
+    assert response.status_code == 400
+    assert 'finite' in response.get_json()['error']
+
+def test_history_default_range(client):
+    response = client.get('/history?metric=temp')
+    assert response.status_code == 200
+    assert response.get_json()['metric'] == 'temp'
+
+def test_stats_etag_names_the_process(client, monkeypatch):
+    temp_server.publish_snapshot(temp_server.get_stats())
+    response = client.get('/stats')
+    etag = response.headers['ETag']
+    assert etag == f'"{temp_server.BOOT_ID}-{response.get_json()["seq"]}"'
+    assert client.get('/stats', headers={'If-None-Match': etag}).status_code == 304
+
+    # Same sequence number from a server that has since restarted
+    monkeypatch.setattr(temp_server, 'BOOT_ID', 'restarted')
+    assert client.get('/stats', headers={'If-None-Match': etag}).status_code == 200
+
+SNAPSHOT = {
+    'seq': 7, 'timestamp': 0.0, 'alerts': [], 'temp': 50.0, 'cpu_percent': 10.0, 'ram_percent': 30.0,
+    'cpu_cores': {'cpu0': 10.0}, 'interfaces': {}, 'thermal_zones': {},
+    'sampled_at': {'temp': 0.0, 'cpu_percent': 0.0, 'ram_percent': 0.0},
+    'aggregates': {'1m': {'temp': {'min': 1.0}, 'cpu_percent': {'min': 2.0}},
+                   '5m': {'temp': {'min': 3.0}}},
+}
+
+def test_parse_fields():
+    assert temp_server.parse_fields({}) is None
+    assert temp_server.parse_fields({'fields': ''}) is None
+    assert temp_server.parse_fields({'fields': 'temp,cpu_percent'}) == {'temp', 'cpu_percent'}
+    with pytest.raises(ValueError, match='bogus'):
+        temp_server.parse_fields({'fields': 'temp,bogus'})
+    with pytest.raises(ValueError, match='cpu_cores'):
+        temp_server.parse_fields({'fields': 'cpu_cores'})
+
+def test_parse_windows_drops_windows_not_kept(monkeypatch):
+    monkeypatch.setattr(temp_server, 'WINDOW_LABELS', ('1m',))
+    assert temp_server.parse_windows({}) is None
+    assert temp_server.parse_windows({'windows': ''}) == set()
+    assert temp_server.parse_windows({'windows': '1m,5m'}) == {'1m'}
+
+def test_project_fields_and_windows():
+    data = temp_server.project(SNAPSHOT, {'temp'}, {'1m'})
+    assert set(data) == {'seq', 'timestamp', 'alerts', 'temp', 'cpu_cores', 'interfaces',
+                         'thermal_zones', 'sampled_at', 'aggregates', 'age'}
+    assert data['sampled_at'] == {'temp': 0.0}
+    assert data['aggregates'] == {'1m': {'temp': {'min': 1.0}}}
+
+def test_project_everything():
+    data = temp_server.project(SNAPSHOT)
+    assert data == dict(SNAPSHOT, age=data['age'])
+    assert temp_server.project(SNAPSHOT, None, set())['aggregates'] == {}
+
+def test_render_metrics():
+    text = temp_server.render_metrics({'temp': 51.5, 'ram_used_mb': 2.0, 'net_sent_bytes': 1234,
+                                       'uptime_hours': None, 'timestamp': 1700000000.0})
+    lines = text.splitlines()
+    assert '# TYPE tp2_network_sent_bytes_total counter' in lines
+    assert 'tp2_network_sent_bytes_total 1234' in lines
+    assert 'tp2_temperature_celsius 51.5' in lines
+    assert f'tp2_memory_used_bytes {2.0 * 1024 * 1024!r}' in lines
+    assert 'tp2_sample_timestamp_seconds 1700000000.0' in lines
+    # Missing stats are left out rather than reported as 0
+    assert not any('uptime' in line for line in lines)
+    assert text.endswith('\n')
@@ -0,0 +1,76 @@
+"""
+Binary stats encoding round trips, including payloads from older nodes
+"""
+
+import struct
+import pytest
+import wire
+
+STATS = {
+    'seq': 42,
+    'timestamp': 1700000000.25,
+    'temp': 51.5,
+    'cpu_percent': 12.5,
+    'ram_percent': 40.0,
+    'uptime_hours': 3.5,
+    'alerts': ['temp', 'disk'],
+    'aggregates': {
+        '1m': {'cpu_percent': {'min': 1.0, 'avg': 12.5, 'max': 100.0, 'p95': 87.5}},
+        '5m': {},
+        '15m': {'temp': {'min': 40.0, 'avg': 45.5, 'max': 51.5, 'p95': 50.0}},
+    },
+}
+
+def test_round_trip():
+    decoded = wire.decode(wire.encode(STATS))
+    assert decoded == STATS
+
+def test_round_trip_older_versions():
+    values = {field: STATS[field] for field in wire.FIELDS if field in STATS}
+    base = dict(values, seq=STATS['seq'], timestamp=STATS['timestamp'])
+    assert wire.decode(wire.encode(STATS, 1)) == base
+    assert wire.decode(wire.encode(STATS, 2)) == dict(base, alerts=STATS['alerts'])
+    with pytest.raises(ValueError):
+        wire.encode(STATS, 99)
+
+def test_negotiate():
+    assert wire.negotiate(wire.accept_header()) == wire.WIRE_VERSION
+    assert wire.negotiate('application/x-tp2-stats; v=2, application/json;q=0.5') == 2
+    # A newer client lists versions this module doesn't know as well
+    assert wire.negotiate('application/x-tp2-stats; v=9, application/x-tp2-stats; v=3') == 3
+    # No version we speak, or binary ranked below JSON: JSON
+    assert wire.negotiate('application/x-tp2-stats; v=9, application/json;q=0.5') is None
+    assert wire.negotiate('application/x-tp2-stats;v=3;q=0.4, application/json;q=0.5') is None
+    # Clients from before negotiation send no version
+    assert wire.negotiate('application/x-tp2-stats, application/json;q=0.5') is None
+    assert wire.negotiate('') is None
+    assert wire.negotiate('*/*') is None
+
+def test_missing_fields_left_out():
+    decoded = wire.decode(wire.encode({'seq': 1, 'timestamp': 2.0, 'temp': None, 'cpu_percent': 3.0}))
+    assert decoded == {'seq': 1, 'timestamp': 2.0, 'cpu_percent': 3.0, 'alerts': [], 'aggregates': {}}
+
+def test_decode_version_1():
+    payload = wire.HEADER_V1.pack(1, 7, 5.0, 0b11) + struct.pack('<2f', 50.0, 25.0)
+    assert wire.decode(payload) == {'temp': 50.0, 'cpu_percent': 25.0, 'seq': 7, 'timestamp': 5.0}
+
+def test_decode_version_2():
+    payload = wire.HEADER.pack(2, 7, 5.0, 0b1, 0b1) + struct.pack('<f', 85.0)
+    assert wire.decode(payload) == {'temp': 85.0, 'seq': 7, 'timestamp': 5.0, 'alerts': ['temp']}
+
+def test_truncated_and_oversized_payloads_rejected():
+    payload = wire.encode(STATS)
+    for length in range(len(payload)):
+        with pytest.raises(ValueError):
+            wire.decode(payload[:length])
+    with pytest.raises(ValueError):
+        wire.decode(payload + b'\0')
+
+def test_unknown_version_rejected():
+    with pytest.raises(ValueError, match='version'):
+        wire.decode(bytes([99]) + wire.encode(STATS)[1:])
+
+def test_datagram_round_trip():
+    name, decoded = wire.decode_datagram(wire.encode_datagram('node1', STATS))
+    assert name == 'node1'
+    assert decoded == STATS
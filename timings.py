@@ -0,0 +1,88 @@
+"""
+Hot-path timing instrumentation shared by temp_server.py and temp_monitor.py
+Monotonic timers feeding rolling per-phase latency percentiles
+"""
+
+import threading
+import time
+from collections import deque
+from contextlib import nullcontext
+
+# Percentiles reported for every phase
+PERCENTILES = (50, 90, 99)
+
+class Timer:
+    """Context manager that records the duration of its block"""
+
+    __slots__ = ('timings', 'name', 'start')
+
+    def __init__(self, timings, name):
+        self.timings = timings
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.timings.record(self.name, time.perf_counter() - self.start)
+
+class Timings:
+    """Rolling window of durations per named phase
+
+    Recording is one perf_counter pair and a deque append under a lock;
+    sorting for percentiles only happens when a summary is asked for, so
+    it is cheap enough to leave on. When disabled, timer() hands out a
+    shared no-op context and record() returns at once.
+    """
+
+    def __init__(self, window=512, enabled=True):
+        self.window = window
+        self.enabled = enabled
+        self.samples = {}  # Phase name -> deque of recent durations (seconds)
+        self.counts = {}  # Phase name -> durations recorded since start
+        self.lock = threading.Lock()
+        self.null_timer = nullcontext()
+
+    def timer(self, name):
+        """Return a context manager that times its block as phase name"""
+        if not self.enabled:
+            return self.null_timer
+        return Timer(self, name)
+
+    def record(self, name, seconds):
+        """Add one duration for a phase"""
+        if not self.enabled:
+            return
+        with self.lock:
+            samples = self.samples.get(name)
+            if samples is None:
+                samples = self.samples[name] = deque(maxlen=self.window)
+                self.counts[name] = 0
+            samples.append(seconds)
+            self.counts[name] += 1
+
+    def summary(self):
+        """Return {phase: {'count', 'p50_ms', 'p90_ms', 'p99_ms', 'max_ms'}}
+
+        Percentiles cover the last `window` durations of each phase; count
+        is the total recorded since start.
+        """
+        with self.lock:
+            phases = {name: (self.counts[name], sorted(samples))
+                      for name, samples in self.samples.items()}
+        result = {}
+        for name, (count, samples) in sorted(phases.items()):
+            entry = {'count': count}
+            for percentile in PERCENTILES:
+                index = min(len(samples) - 1, len(samples) * percentile // 100)
+                entry[f'p{percentile}_ms'] = round(samples[index] * 1000, 3)
+            entry['max_ms'] = round(samples[-1] * 1000, 3)
+            result[name] = entry
+        return result
+
+    def summary_line(self):
+        """One console line with the median and p99 of every phase"""
+        parts = [f"{name} {entry['p50_ms']:.1f}/{entry['p99_ms']:.1f}ms"
+                 for name, entry in self.summary().items()]
+        return "Timings (p50/p99): " + (", ".join(parts) if parts else "none yet")
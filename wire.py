@@ -0,0 +1,208 @@
+"""
+Compact binary encoding of a stats snapshot
+Shared by temp_server.py (encoder) and temp_monitor.py (decoder)
+
+Layout (little-endian):
+  B  schema version (WIRE_VERSION)
+  I  snapshot sequence number
+  d  sample timestamp (Unix time)
+  I  presence mask, bit i set if FIELDS[i] follows
+  H  active alerts, bit i set if alerts.ALERT_NAMES[i] is raised (version 2+)
+  f  one 32-bit float per present field, in FIELDS order
+  B  number of aggregate windows that follow (version 3+), each one:
+       I  window length in seconds
+       I  presence mask, bit i set if FIELDS[i] has aggregates
+       4f min, avg, max and p95 per present field, in FIELDS order
+
+Over HTTP the version is negotiated: clients list the versions they decode
+as 'application/x-tp2-stats; v=3' in Accept, and the server answers in the
+highest one it also speaks, or in JSON if there is none (see negotiate()).
+
+Multicast datagrams prefix this with the sending node's name: one length
+byte, then that many bytes of UTF-8.
+"""
+
+import struct
+from aggregates import parse_duration, window_label
+from alerts import alert_mask, alert_names
+
+WIRE_VERSION = 3
+# Every version encode() and decode() support, newest first
+VERSIONS = (3, 2, 1)
+MEDIA_TYPE = 'application/x-tp2-stats'
+
+# Field order is part of the schema: append new fields, never reorder
+FIELDS = (
+    'temp',
+    'cpu_percent',
+    'load_avg',
+    'ram_percent',
+    'ram_used_mb',
+    'ram_total_mb',
+    'net_sent_mb',
+    'net_recv_mb',
+    'net_send_rate_kbs',
+    'net_recv_rate_kbs',
+    'disk_percent',
+    'disk_free_gb',
+    'uptime_hours',
+)
+
+HEADER = struct.Struct('<BIdIH')
+# Version 1 had no alert mask; still decoded for nodes not yet upgraded
+HEADER_V1 = struct.Struct('<BIdI')
+VALUE = struct.Struct('<f')
+WINDOW_COUNT = struct.Struct('<B')
+WINDOW = struct.Struct('<II')
+# Order of each field's aggregate values
+AGGREGATE_STATS = ('min', 'avg', 'max', 'p95')
+AGGREGATE = struct.Struct('<4f')
+
+def encode_aggregates(aggregates):
+    """Encode {window label: {field: {min, avg, max, p95}}} after the values"""
+    parts = [WINDOW_COUNT.pack(len(aggregates))]
+    for label, fields in aggregates.items():
+        mask = 0
+        values = []
+        for bit, field in enumerate(FIELDS):
+            aggregate = fields.get(field)
+            if aggregate is not None:
+                mask |= 1 << bit
+                values.append(AGGREGATE.pack(*(aggregate[stat] for stat in AGGREGATE_STATS)))
+        parts.append(WINDOW.pack(int(parse_duration(label)), mask))
+        parts.extend(values)
+    return b''.join(parts)
+
+def decode_aggregates(data, offset):
+    """Decode encode_aggregates() output at offset; returns (aggregates, end)"""
+    (count,) = WINDOW_COUNT.unpack_from(data, offset)
+    offset += WINDOW_COUNT.size
+    aggregates = {}
+    for _ in range(count):
+        seconds, mask = WINDOW.unpack_from(data, offset)
+        offset += WINDOW.size
+        fields = {}
+        for bit, field in enumerate(FIELDS):
+            if mask & (1 << bit):
+                values = AGGREGATE.unpack_from(data, offset)
+                offset += AGGREGATE.size
+                fields[field] = dict(zip(AGGREGATE_STATS, values))
+        aggregates[window_label(seconds)] = fields
+    return aggregates, offset
+
+def media_type(version):
+    """Content type of a payload in one schema version"""
+    return f"{MEDIA_TYPE}; v={version}"
+
+def accept_header(json_quality=0.5):
+    """Accept header asking for any version decode() supports, JSON as a fallback"""
+    return ', '.join([media_type(version) for version in VERSIONS] + [f"application/json;q={json_quality}"])
+
+def negotiate(accept):
+    """Schema version to answer an Accept header with, or None for JSON
+
+    Binary is used only if a listed version that encode() supports ranks
+    above JSON; the newest such version wins. MEDIA_TYPE without a v=
+    parameter names no version and never matches, so clients from before
+    versions were negotiated get JSON, which they all understand.
+    """
+    json_quality = 0.0
+    versions = {}
+    for item in accept.split(','):
+        media, *params = [part.strip() for part in item.split(';')]
+        quality, version = 1.0, None
+        for param in params:
+            name, _, value = param.partition('=')
+            try:
+                if name.strip() == 'q':
+                    quality = float(value)
+                elif name.strip() == 'v':
+                    version = int(value)
+            except ValueError:
+                quality = 0.0
+        if media in ('application/json', 'application/*', '*/*'):
+            json_quality = max(json_quality, quality)
+        elif media == MEDIA_TYPE and version in VERSIONS:
+            versions[version] = max(versions.get(version, 0.0), quality)
+    preferred = [version for version, quality in versions.items() if quality > json_quality]
+    return max(preferred) if preferred else None
+
+def encode(stats, version=WIRE_VERSION):
+    """Encode a snapshot dict in a schema version from VERSIONS
+
+    Fields that are missing or None are left out, as is whatever the
+    version has no room for (alerts before 2, aggregates before 3).
+    """
+    mask = 0
+    values = []
+    for bit, field in enumerate(FIELDS):
+        value = stats.get(field)
+        if value is not None:
+            mask |= 1 << bit
+            values.append(value)
+    if version not in VERSIONS:
+        raise ValueError(f"Unsupported stats schema version {version}")
+    if version == 1:
+        header = HEADER_V1.pack(version, stats.get('seq', 0), stats.get('timestamp', 0.0), mask)
+    else:
+        header = HEADER.pack(version, stats.get('seq', 0), stats.get('timestamp', 0.0), mask,
+                             alert_mask(stats.get('alerts') or ()))
+    payload = header + struct.pack(f'<{len(values)}f', *values)
+    if version >= 3:
+        payload += encode_aggregates(stats.get('aggregates') or {})
+    return payload
+
+def decode(data):
+    """Decode bytes from encode() back into a snapshot dict
+
+    Version 1 payloads decode without 'alerts', versions 1 and 2 without
+    'aggregates'. Raises ValueError for an unknown schema version or a
+    truncated payload.
+    """
+    if not data:
+        raise ValueError("Truncated stats payload")
+    version = data[0]
+    if version in (WIRE_VERSION, 2):
+        header = HEADER
+    elif version == 1:
+        header = HEADER_V1
+    else:
+        raise ValueError(f"Unsupported stats schema version {version}")
+    if len(data) < header.size:
+        raise ValueError("Truncated stats payload")
+    version, seq, timestamp, mask, *alerts = header.unpack_from(data)
+    present = [field for bit, field in enumerate(FIELDS) if mask & (1 << bit)]
+    end = header.size + VALUE.size * len(present)
+    if version < 3 and len(data) != end:
+        raise ValueError("Stats payload length does not match its field mask")
+    try:
+        values = struct.unpack_from(f'<{len(present)}f', data, header.size)
+        if version >= 3:
+            aggregates, end = decode_aggregates(data, end)
+    except struct.error:
+        raise ValueError("Truncated stats payload") from None
+    if len(data) != end:
+        raise ValueError("Stats payload length does not match its field masks")
+    stats = dict(zip(present, values))
+    stats['seq'] = seq
+    stats['timestamp'] = timestamp
+    if alerts:
+        stats['alerts'] = alert_names(alerts[0])
+    if version >= 3:
+        stats['aggregates'] = aggregates
+    return stats
+
+def encode_datagram(name, stats, version=WIRE_VERSION):
+    """Encode a snapshot prefixed with the sending node's name"""
+    name = name.encode()[:255]
+    return bytes([len(name)]) + name + encode(stats, version)
+
+def decode_datagram(data):
+    """Split a datagram from encode_datagram() into (name, stats)
+
+    Raises ValueError if the datagram is malformed.
+    """
+    if not data or len(data) < 1 + data[0]:
+        raise ValueError("Truncated datagram")
+    length = data[0]
+    return data[1:1 + length].decode(errors='replace'), decode(data[1 + length:])